@@ -610,6 +610,13 @@ class HiveSQLAdapter(sql_adapter.SqlAdapter):
     def drop_table(self, *, schema_name: typing.Optional[str], table_name: str) -> str:
         raise NotImplementedError
 
+    def row_checksum_expression(self, /, columns: typing.Sequence[col.Column]) -> str:
+        return self.row_hash_expression(columns)
+
+    def row_hash_expression(self, /, columns: typing.Sequence[col.Column]) -> str:
+        col_names_csv = ", ".join(self.wrap(column.column_name) for column in columns)
+        return f"hash({col_names_csv})"
+
     def table_exists(
         self, *, schema_name: typing.Optional[str], table_name: str
     ) -> str:
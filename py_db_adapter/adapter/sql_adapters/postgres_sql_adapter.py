@@ -539,6 +539,17 @@ class PostgreSQLAdapter(sql_adapter.SqlAdapter):
                     )
             """
 
+    def row_checksum_expression(self, /, columns: typing.Sequence[col.Column]) -> str:
+        row_hash = self.row_hash_expression(columns)
+        return f"('x' || substr({row_hash}, 1, 8))::bit(32)::int"
+
+    def row_hash_expression(self, /, columns: typing.Sequence[col.Column]) -> str:
+        values_csv = ", ".join(
+            f"COALESCE(CAST({self.wrap(column.column_name)} AS TEXT), '\\N')"
+            for column in columns
+        )
+        return f"md5(concat_ws(chr(31), {values_csv}))"
+
     def table_exists(self, schema_name: typing.Optional[str], table_name: str) -> str:
         return (
             f"SELECT CASE WHEN to_regclass('{self.full_table_name(schema_name=schema_name, table_name=table_name)}') "
@@ -6,6 +6,7 @@ import typing
 from py_db_adapter.domain import (
     column as col,
     column_adapters,
+    data_types,
     sql_adapter,
     std_column_adapters,
 )
@@ -269,6 +270,12 @@ class SqlServerSQLAdapter(sql_adapter.SqlAdapter):
                 AND (index_id=0 or index_id=1)
         """
 
+    def row_checksum_expression(self, /, columns: typing.Sequence[col.Column]) -> str:
+        return f"CAST(CAST({self._md5(columns)} AS BINARY(4)) AS INT)"
+
+    def row_hash_expression(self, /, columns: typing.Sequence[col.Column]) -> str:
+        return f"CONVERT(CHAR(32), {self._md5(columns)}, 2)"
+
     def table_exists(self, schema_name: typing.Optional[str], table_name: str) -> str:
         full_table_name = self.full_table_name(
             schema_name=schema_name, table_name=table_name
@@ -291,6 +298,30 @@ class SqlServerSQLAdapter(sql_adapter.SqlAdapter):
         else:
             return obj_name
 
+    def _md5(self, /, columns: typing.Sequence[col.Column]) -> str:
+        # + is used instead of CONCAT, since CONCAT needs at least 2 arguments
+        values = " + NCHAR(31) + ".join(
+            f"ISNULL({self._text(column)}, N'\\N')" for column in columns
+        )
+        return f"HASHBYTES('MD5', {values})"
+
+    def _text(self, /, column: col.Column) -> str:
+        """Convert a column to text without losing any of its precision
+
+        The default style drops the seconds of datetimes, keeps 6 significant digits
+        of floats and 2 decimal places of money, which is inspected as a decimal.
+        """
+        style = {
+            data_types.DataType.Date: 126,
+            data_types.DataType.DateTime: 126,
+            data_types.DataType.Decimal: 2,
+            data_types.DataType.Float: 3,
+        }.get(column.data_type)
+        wrapped_column_name = self.wrap(column.column_name)
+        if style is None:
+            return f"CAST({wrapped_column_name} AS NVARCHAR(MAX))"
+        return f"CONVERT(NVARCHAR(MAX), {wrapped_column_name}, {style})"
+
 
 class SqlServerDateTimeColumnSqlAdapter(column_adapters.DateTimeColumnSqlAdapter):
     def __init__(self, *, column: col.Column, wrapper: typing.Callable[[str], str]):
@@ -1,23 +1,36 @@
 from py_db_adapter.domain import exceptions
+from py_db_adapter.domain.arrow_interop import *
 from py_db_adapter.domain.change_tracking_result import *
 from py_db_adapter.domain.column import *
 from py_db_adapter.domain.column_adapter import *
 from py_db_adapter.domain.column_adapters import *
+from py_db_adapter.domain.column_storage import *
 from py_db_adapter.domain.compare_rows import *
 from py_db_adapter.domain.const import *
 from py_db_adapter.domain.data_types import *
 from py_db_adapter.domain.db_adapter import *
+from py_db_adapter.domain.dictionary_column import *
+from py_db_adapter.domain.diff_strategy import *
 from py_db_adapter.domain.logger import *
+from py_db_adapter.domain.memory_tracker import *
+from py_db_adapter.domain.named_row import *
+from py_db_adapter.domain.ordering import *
 from py_db_adapter.domain.primary_key import *
 from py_db_adapter.domain.repository import *
 from py_db_adapter.domain.row_comparison_results import *
 from py_db_adapter.domain.row_diff import *
+from py_db_adapter.domain.row_hash import *
+from py_db_adapter.domain.row_index import *
+from py_db_adapter.domain.row_stream import *
 from py_db_adapter.domain.rows import *
+from py_db_adapter.domain.rows_builder import *
 from py_db_adapter.domain.sql_adapter import *
 from py_db_adapter.domain.sql_formatter import *
 from py_db_adapter.domain.sql_operator import *
+from py_db_adapter.domain.spill import *
 from py_db_adapter.domain.sql_predicate import *
 from py_db_adapter.domain.std_column_adapters import *
 from py_db_adapter.domain.sync_result import *
 from py_db_adapter.domain.table import *
+from py_db_adapter.domain.typed_column import *
 from py_db_adapter.domain.unique_constraint import *
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import datetime
+import importlib
+import typing
+
+from py_db_adapter.domain import data_types, exceptions, table as domain_table
+from py_db_adapter.domain.column_storage import ChunkedColumn
+from py_db_adapter.domain.dictionary_column import DictionaryColumn
+from py_db_adapter.domain.spill import SpilledColumn
+from py_db_adapter.domain.typed_column import TypedColumn
+
+if typing.TYPE_CHECKING:
+    import pyarrow
+
+__all__ = ("arrow_array", "arrow_schema", "import_pyarrow", "import_pyarrow_parquet")
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def arrow_array(
+    values: typing.Sequence[typing.Any],
+    /,
+    arrow_type: typing.Optional[pyarrow.DataType] = None,
+) -> typing.Union[pyarrow.Array, pyarrow.ChunkedArray]:
+    """Convert a column to Arrow
+
+    TypedColumn and DictionaryColumn values are handed to Arrow as buffers, so they
+    are never boxed into Python objects on the way.
+    """
+    pa = import_pyarrow()
+    if isinstance(values, SpilledColumn):
+        values = values.load()
+    if not len(values):
+        return pa.array([], type=arrow_type)
+
+    if isinstance(values, ChunkedColumn):
+        chunks = [arrow_array(chunk, arrow_type) for chunk in values.chunks]
+        if len({chunk.type for chunk in chunks}) > 1:
+            chunks = [
+                (
+                    chunk.dictionary_decode()
+                    if pa.types.is_dictionary(chunk.type)
+                    else chunk
+                )
+                for chunk in chunks
+            ]
+        if len({chunk.type for chunk in chunks}) > 1:
+            return pa.array(list(values), type=arrow_type)
+        return pa.chunked_array(chunks)
+    elif isinstance(values, TypedColumn):
+        array = _typed_array(values)
+    elif isinstance(values, DictionaryColumn):
+        array = _dictionary_array(values)
+    else:
+        return pa.array(
+            values if isinstance(values, (list, tuple)) else list(values),
+            type=arrow_type,
+        )
+    if arrow_type is not None and array.type != arrow_type:
+        return array.cast(arrow_type)
+    return array
+
+
+def arrow_schema(
+    table: domain_table.Table,
+    /,
+    column_names: typing.Optional[typing.Iterable[str]] = None,
+) -> pyarrow.Schema:
+    """Map a Table's column metadata to an Arrow schema
+
+    Columns are returned in the order of column_names, or sorted by name if that is
+    not provided.
+    """
+    pa = import_pyarrow()
+    col_names = sorted(table.column_names) if column_names is None else column_names
+    fields = []
+    for col_name in col_names:
+        col = table.column_by_name(col_name)
+        if col.data_type == data_types.DataType.Decimal:
+            arrow_type = pa.decimal128(col.precision or 38, col.scale or 0)
+        else:
+            arrow_type = {
+                data_types.DataType.Bool: pa.bool_(),
+                data_types.DataType.Date: pa.date32(),
+                data_types.DataType.DateTime: pa.timestamp("us"),
+                data_types.DataType.Float: pa.float64(),
+                data_types.DataType.Int: pa.int64(),
+                data_types.DataType.Text: pa.string(),
+            }[col.data_type]
+        fields.append(pa.field(col_name, arrow_type, nullable=col.nullable))
+    return pa.schema(fields)
+
+
+def import_pyarrow() -> typing.Any:
+    try:
+        import pyarrow
+
+        return pyarrow
+    except ImportError:
+        raise exceptions.MissingOptionalDependency(package="pyarrow", extra="arrow")
+
+
+def import_pyarrow_parquet() -> typing.Any:
+    import_pyarrow()
+    return importlib.import_module("pyarrow.parquet")
+
+
+def _dictionary_array(values: DictionaryColumn, /) -> pyarrow.DictionaryArray:
+    pa = import_pyarrow()
+    codes = memoryview(values.codes)
+    index_type = {1: pa.uint8(), 2: pa.uint16(), 4: pa.uint32(), 8: pa.uint64()}[
+        codes.itemsize
+    ]
+    indices = pa.Array.from_buffers(index_type, len(codes), [None, pa.py_buffer(codes)])
+    dictionary = values.dictionary
+    if None in dictionary:
+        # Arrow marks NULLs in the indices' validity bitmap rather than in the
+        # dictionary, so the NULL entry is dropped and the codes past it shift down
+        pc = _import_pyarrow_compute()
+        null_code = pa.scalar(dictionary.index(None), index_type)
+        is_valid = pc.not_equal(indices, null_code)
+        shifted = pc.subtract(
+            indices, pc.cast(pc.greater(indices, null_code), index_type)
+        )
+        indices = pa.Array.from_buffers(
+            index_type, len(codes), [is_valid.buffers()[1], shifted.buffers()[1]]
+        )
+        dictionary = [value for value in dictionary if value is not None]
+    return pa.DictionaryArray.from_arrays(indices, pa.array(dictionary))
+
+
+def _import_pyarrow_compute() -> typing.Any:
+    import_pyarrow()
+    return importlib.import_module("pyarrow.compute")
+
+
+def _typed_array(values: TypedColumn, /) -> pyarrow.Array:
+    pa = import_pyarrow()
+    storage_type = {
+        data_types.DataType.Bool: pa.int8(),
+        data_types.DataType.Date: pa.int32(),
+        data_types.DataType.DateTime: pa.timestamp("us"),
+        data_types.DataType.Float: pa.float64(),
+        data_types.DataType.Int: pa.int64(),
+    }[values.kind]
+    validity = values.validity()
+    array = pa.Array.from_buffers(
+        storage_type,
+        len(values),
+        [
+            None if validity is None else pa.py_buffer(validity),
+            pa.py_buffer(memoryview(values.values)),
+        ],
+    )
+    if values.kind == data_types.DataType.Bool:
+        return array.cast(pa.bool_())
+    elif values.kind == data_types.DataType.Date:
+        # the column holds proleptic Gregorian ordinals and date32 counts days
+        # since the Unix epoch
+        pc = _import_pyarrow_compute()
+        days = pc.subtract(array, pa.scalar(_EPOCH_ORDINAL, pa.int32()))
+        return days.cast(pa.date32())
+    return array
@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import bisect
+import itertools
+import operator
+import sys
+import typing
+
+from py_db_adapter.domain.dictionary_column import DictionaryColumn
+from py_db_adapter.domain.spill import SpilledColumn, estimate_nbytes
+from py_db_adapter.domain.typed_column import TypedColumn
+
+__all__ = (
+    "ChunkedColumn",
+    "ColumnView",
+    "ConstantColumn",
+    "column_nbytes",
+    "column_slice",
+    "column_take",
+    "columns_equal",
+)
+
+
+class ChunkedColumn(typing.Sequence[typing.Any]):
+    """Column made up of several chunks that are read in order
+
+    Concatenating chunked columns only appends chunk references, and iteration walks
+    the chunks lazily.
+    """
+
+    __slots__ = ("_chunks", "_offsets", "_length")
+
+    def __init__(self, chunks: typing.Iterable[typing.Sequence[typing.Any]], /):
+        self._chunks: typing.List[typing.Sequence[typing.Any]] = []
+        for chunk in chunks:
+            if isinstance(chunk, ChunkedColumn):
+                self._chunks.extend(chunk.chunks)
+            elif len(chunk):
+                self._chunks.append(chunk)
+        self._offsets = list(
+            itertools.accumulate((len(chunk) for chunk in self._chunks), initial=0)
+        )
+        self._length = self._offsets[-1]
+
+    @property
+    def chunks(self) -> typing.List[typing.Sequence[typing.Any]]:
+        return self._chunks
+
+    def take(self, /, positions: typing.Sequence[int]) -> typing.Sequence[typing.Any]:
+        """Values at the positions, taken from each chunk in runs
+
+        Each chunk is read at most once.  If the positions jump back and forth
+        between chunks, the values are returned as a plain tuple instead of as many
+        small chunks.
+        """
+        runs: typing.List[typing.Tuple[int, typing.List[int]]] = []
+        for pos in positions:
+            if pos < 0:
+                pos += self._length
+            if pos < 0 or pos >= self._length:
+                raise IndexError("ChunkedColumn index out of range")
+            chunk_ix = bisect.bisect_right(self._offsets, pos) - 1
+            if not runs or runs[-1][0] != chunk_ix:
+                runs.append((chunk_ix, []))
+            runs[-1][1].append(pos - self._offsets[chunk_ix])
+
+        loaded: typing.Dict[int, typing.Sequence[typing.Any]] = {}
+        for chunk_ix, _ in runs:
+            if chunk_ix not in loaded:
+                chunk = self._chunks[chunk_ix]
+                loaded[chunk_ix] = (
+                    chunk.load() if isinstance(chunk, SpilledColumn) else chunk
+                )
+        if len(runs) > len(self._chunks):
+            return tuple(loaded[chunk_ix][pos] for chunk_ix, run in runs for pos in run)
+        parts = [column_take(loaded[chunk_ix], run) for chunk_ix, run in runs]
+        if len(parts) == 1:
+            return parts[0]
+        return ChunkedColumn(parts)
+
+    def view(self, /, offset: int, length: int) -> typing.Sequence[typing.Any]:
+        stop = min(offset + length, self._length)
+        if offset >= stop:
+            return tuple()
+        first = bisect.bisect_right(self._offsets, offset) - 1
+        last = bisect.bisect_right(self._offsets, stop - 1) - 1
+        parts = [
+            column_slice(
+                self._chunks[i],
+                max(offset - self._offsets[i], 0),
+                min(stop, self._offsets[i + 1]) - max(offset, self._offsets[i]),
+            )
+            for i in range(first, last + 1)
+        ]
+        if len(parts) == 1:
+            return parts[0]
+        return ChunkedColumn(parts)
+
+    @typing.overload
+    def __getitem__(self, ix: int) -> typing.Any:
+        ...
+
+    @typing.overload
+    def __getitem__(self, ix: slice) -> typing.Sequence[typing.Any]:
+        ...
+
+    def __getitem__(
+        self, ix: typing.Union[int, slice]
+    ) -> typing.Union[typing.Any, typing.Sequence[typing.Any]]:
+        if isinstance(ix, slice):
+            start, stop, step = ix.indices(self._length)
+            if step == 1:
+                return self.view(start, stop - start)
+            return [self[i] for i in range(start, stop, step)]
+        if ix < 0:
+            ix += self._length
+        if ix < 0 or ix >= self._length:
+            raise IndexError("ChunkedColumn index out of range")
+        chunk_ix = bisect.bisect_right(self._offsets, ix) - 1
+        return self._chunks[chunk_ix][ix - self._offsets[chunk_ix]]
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        return itertools.chain.from_iterable(self._chunks)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __reduce__(self) -> typing.Tuple[typing.Any, ...]:
+        return ChunkedColumn, (self._chunks,)
+
+    def __repr__(self) -> str:
+        return f"<ChunkedColumn: {len(self._chunks)} chunks, length={self._length}>"
+
+
+class ColumnView(typing.Sequence[typing.Any]):
+    """Read-only window over another column's values
+
+    The view only stores an offset and a length, so slicing a column into batches
+    does not copy any values.
+    """
+
+    __slots__ = ("_values", "_offset", "_length")
+
+    def __init__(
+        self,
+        values: typing.Sequence[typing.Any],
+        /,
+        offset: int,
+        length: int,
+    ):
+        if isinstance(values, ColumnView):
+            offset += values.offset
+            values = values.base
+        self._values: typing.Sequence[typing.Any] = values
+        self._offset = offset
+        self._length = max(min(length, len(values) - offset), 0)
+
+    @property
+    def base(self) -> typing.Sequence[typing.Any]:
+        return self._values
+
+    @property
+    def offset(self) -> int:
+        return self._offset
+
+    @typing.overload
+    def __getitem__(self, ix: int) -> typing.Any:
+        ...
+
+    @typing.overload
+    def __getitem__(self, ix: slice) -> typing.Sequence[typing.Any]:
+        ...
+
+    def __getitem__(
+        self, ix: typing.Union[int, slice]
+    ) -> typing.Union[typing.Any, typing.Sequence[typing.Any]]:
+        if isinstance(ix, slice):
+            start, stop, step = ix.indices(self._length)
+            if step == 1:
+                return ColumnView(self, start, stop - start)
+            return [self[i] for i in range(start, stop, step)]
+        if ix < 0:
+            ix += self._length
+        if ix < 0 or ix >= self._length:
+            raise IndexError("ColumnView index out of range")
+        return self._values[self._offset + ix]
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        if self._offset == 0 and self._length == len(self._values):
+            return iter(self._values)
+        return map(
+            self._values.__getitem__,
+            range(self._offset, self._offset + self._length),
+        )
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __reduce__(self) -> typing.Tuple[typing.Any, ...]:
+        # only the visible values are pickled, not the whole base column, and like
+        # any tuple they are pickled one value at a time
+        return tuple, (tuple(self),)
+
+    def __repr__(self) -> str:
+        return f"<ColumnView: offset={self._offset}, length={self._length}>"
+
+
+class ConstantColumn(typing.Sequence[typing.Any]):
+    """Column that repeats a single value without storing it once per row"""
+
+    __slots__ = ("_value", "_length")
+
+    def __init__(self, value: typing.Any, /, length: int):
+        self._value = value
+        self._length = length
+
+    @property
+    def value(self) -> typing.Any:
+        return self._value
+
+    @typing.overload
+    def __getitem__(self, ix: int) -> typing.Any:
+        ...
+
+    @typing.overload
+    def __getitem__(self, ix: slice) -> typing.Sequence[typing.Any]:
+        ...
+
+    def __getitem__(
+        self, ix: typing.Union[int, slice]
+    ) -> typing.Union[typing.Any, typing.Sequence[typing.Any]]:
+        if isinstance(ix, slice):
+            return ConstantColumn(self._value, len(range(*ix.indices(self._length))))
+        if -self._length <= ix < self._length:
+            return self._value
+        raise IndexError("ConstantColumn index out of range")
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        return itertools.repeat(self._value, self._length)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __repr__(self) -> str:
+        return f"<ConstantColumn: value={self._value!r}, length={self._length}>"
+
+
+def column_nbytes(values: typing.Sequence[typing.Any], /) -> int:
+    """Estimated number of bytes a column holds in memory"""
+    if isinstance(values, ChunkedColumn):
+        return sys.getsizeof(values) + sum(map(column_nbytes, values.chunks))
+    elif isinstance(values, ConstantColumn):
+        return sys.getsizeof(values) + sys.getsizeof(values.value)
+    elif isinstance(values, DictionaryColumn):
+        return (
+            sys.getsizeof(values)
+            + memoryview(values.codes).nbytes
+            + estimate_nbytes(values.dictionary)
+        )
+    elif isinstance(values, TypedColumn):
+        return (
+            sys.getsizeof(values)
+            + memoryview(values.values).nbytes
+            + (0 if values.nulls is None else len(values.nulls))
+        )
+    elif isinstance(values, SpilledColumn):
+        return sys.getsizeof(values)
+    else:
+        return estimate_nbytes(values)
+
+
+def column_slice(
+    values: typing.Sequence[typing.Any], /, offset: int, length: int
+) -> typing.Sequence[typing.Any]:
+    """Slice a column without copying its values
+
+    A SpilledColumn is the exception: it is loaded once and the loaded values are
+    sliced, since a view over it would unpickle the chunk again for every value.
+    """
+    if isinstance(values, (ChunkedColumn, DictionaryColumn, TypedColumn)):
+        return values.view(offset, length)
+    elif isinstance(values, SpilledColumn):
+        return values.load()[offset : offset + length]
+    elif isinstance(values, ConstantColumn):
+        return ConstantColumn(
+            values.value, max(min(length, len(values) - offset), 0)
+        )
+    else:
+        return ColumnView(values, offset, length)
+
+
+def column_take(
+    values: typing.Sequence[typing.Any], /, positions: typing.Sequence[int]
+) -> typing.Sequence[typing.Any]:
+    """Copy the values at the positions into a column stored like the original"""
+    if isinstance(values, (ChunkedColumn, DictionaryColumn, TypedColumn)):
+        return values.take(positions)
+    elif isinstance(values, SpilledColumn):
+        return column_take(values.load(), positions)
+    elif isinstance(values, ColumnView):
+        base, offset = values.base, values.offset
+        return column_take(base, [offset + pos for pos in positions])
+    elif isinstance(values, ConstantColumn):
+        return ConstantColumn(values.value, len(positions))
+    else:
+        return tuple(map(values.__getitem__, positions))
+
+
+def columns_equal(
+    a: typing.Sequence[typing.Any], b: typing.Sequence[typing.Any], /
+) -> bool:
+    if a is b:
+        return True
+    if len(a) != len(b):
+        return False
+    if type(a) is type(b) and isinstance(a, (list, tuple)):
+        return a == b
+    if (
+        isinstance(a, DictionaryColumn)
+        and isinstance(b, DictionaryColumn)
+        and a.dictionary is b.dictionary
+    ):
+        return a.codes == b.codes
+    if (
+        isinstance(a, TypedColumn)
+        and isinstance(b, TypedColumn)
+        and a.kind == b.kind
+        and a.nulls is None
+        and b.nulls is None
+    ):
+        return memoryview(a.values) == memoryview(b.values)
+    return all(map(operator.eq, a, b))
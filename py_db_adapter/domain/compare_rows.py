@@ -1,69 +1,273 @@
+import concurrent.futures
+import contextlib
+import os
 import typing
 import warnings
 
+from py_db_adapter.domain.ordering import merge_sorted
 from py_db_adapter.domain.row_diff import RowDiff
-from py_db_adapter.domain.rows import Rows, rows_from_lookup_table, rows_to_lookup_table
+from py_db_adapter.domain.row_hash import stable_hash
+from py_db_adapter.domain.row_stream import RowSource, RowStream
+from py_db_adapter.domain.rows import (
+    Row,
+    Rows,
+    lookup_table_from_tuples,
+    row_getter,
+    rows_to_lookup_table,
+)
+from py_db_adapter.domain.rows_builder import RowsBuilder
 
-__all__ = ("compare_rows",)
+__all__ = ("compare_rows", "compare_rows_parallel", "compare_sorted_rows")
 
 
 def compare_rows(
     *,
     key_cols: typing.Set[str],
-    src_rows: Rows,
-    dest_rows: Rows,
+    src_rows: RowSource,
+    dest_rows: RowSource,
     compare_cols: typing.Optional[typing.Set[str]] = None,
+    compare_digests: bool = False,
 ) -> RowDiff:
-    src_cols = set(src_rows.column_names)
-    dest_cols = set(dest_rows.column_names)
-    if compare_cols is None:
-        common_cols = src_cols & dest_cols
-    else:
-        common_cols = key_cols | compare_cols
-    common_compare_cols = common_cols - key_cols
-    common_key_cols = key_cols & common_cols
+    """Compare two sets of rows by holding each side in a lookup table keyed on key_cols
 
-    src_lkp_tbl = rows_to_lookup_table(
+    With compare_digests, each key maps to a 64-bit digest of its compare columns
+    instead of the values themselves, and the diff only holds the key columns.
+    """
+    common_key_cols, common_compare_cols = _common_columns(
+        key_cols=key_cols,
+        src_rows=src_rows,
+        dest_rows=dest_rows,
+        compare_cols=compare_cols,
+    )
+    src_lkp_tbl = _lookup_table(
         rs=src_rows,
         key_columns=common_key_cols,
         value_columns=common_compare_cols,
+        digests=compare_digests,
     )
-    dest_lkp_tbl = rows_to_lookup_table(
+    dest_lkp_tbl = _lookup_table(
         rs=dest_rows,
         key_columns=common_key_cols,
         value_columns=common_compare_cols,
+        digests=compare_digests,
     )
-    src_key_set = set(src_lkp_tbl.keys())
-    dest_key_set = set(dest_lkp_tbl.keys())
-    added = {k: src_lkp_tbl[k] for k in (src_key_set - dest_key_set)}
-    deleted = {k: src_lkp_tbl.get(k, tuple()) for k in (dest_key_set - src_key_set)}
-    if common_compare_cols:
-        updates = {
-            k: src_lkp_tbl.get(k, tuple())
-            for k in src_key_set
-            if k not in added
-            and k not in deleted
-            and src_lkp_tbl.get(k, tuple()) != dest_lkp_tbl.get(k, tuple())
-        }
-    else:
-        warnings.warn(
-            "There were no common comparison columns, so no updates can be calculated."
+    added, deleted, updated = _diff_builders(
+        key_cols=common_key_cols,
+        compare_cols=common_compare_cols,
+        keys_only=compare_digests,
+    )
+    for key, src_values in src_lkp_tbl.items():
+        dest_values = dest_lkp_tbl.get(key)
+        if dest_values is None:
+            added.append(key if compare_digests else key + src_values)
+        elif common_compare_cols and src_values != dest_values:
+            updated.append(key if compare_digests else key + src_values)
+    deleted.extend(key for key in dest_lkp_tbl if key not in src_lkp_tbl)
+    return RowDiff(
+        rows_added=added.build(),
+        rows_deleted=deleted.build(),
+        rows_updated=updated.build(),
+    )
+
+
+def compare_rows_parallel(
+    *,
+    key_cols: typing.Set[str],
+    src_rows: Rows,
+    dest_rows: Rows,
+    compare_cols: typing.Optional[typing.Set[str]] = None,
+    compare_digests: bool = False,
+    max_workers: typing.Optional[int] = None,  # None = one per CPU
+    executor: typing.Optional[concurrent.futures.Executor] = None,  # None = new pool
+    min_rows: int = 100_000,  # fewer rows on both sides together are diffed serially
+) -> RowDiff:
+    """compare_rows spread over a process pool, one hash partition of the keys each
+
+    Both sides are split with Rows.partition_by_hash on their key columns, so a key
+    only ever has to be looked for in the matching partition of the other side.
+    Each task is sent only the rows of its partition, and the workers hold no state
+    of their own, so the pool works with any multiprocessing start method.  Pass an
+    executor to reuse a pool across calls; it is left running afterwards.
+
+    Splitting and shipping the partitions is serial work in this process, so with a
+    single CPU, a single worker or fewer than min_rows rows, compare_rows is called
+    directly instead.
+
+    The pool pickles the partitions in-band.  Typed and dictionary-encoded columns
+    travel as blocks of bytes, but plain columns are pickled value by value.
+    """
+    partitions = max_workers or os.cpu_count() or 1
+    if (
+        partitions < 2
+        or os.cpu_count() == 1
+        or src_rows.row_count + dest_rows.row_count < min_rows
+    ):
+        return compare_rows(
+            key_cols=key_cols,
+            src_rows=src_rows,
+            dest_rows=dest_rows,
+            compare_cols=compare_cols,
+            compare_digests=compare_digests,
         )
-        updates = {}
+
+    common_key_cols, _ = _common_columns(
+        key_cols=key_cols,
+        src_rows=src_rows,
+        dest_rows=dest_rows,
+        compare_cols=compare_cols,
+    )
+    key_col_names = sorted(common_key_cols)
+    src_partitions = src_rows.partition_by_hash(key_col_names, partitions)
+    dest_partitions = dest_rows.partition_by_hash(key_col_names, partitions)
+    pool: typing.ContextManager[concurrent.futures.Executor] = (
+        concurrent.futures.ProcessPoolExecutor(max_workers=partitions)
+        if executor is None
+        else contextlib.nullcontext(executor)
+    )
+    with pool as pool_executor:
+        futures = [
+            pool_executor.submit(
+                compare_rows,
+                key_cols=key_cols,
+                src_rows=src_partition,
+                dest_rows=dest_partition,
+                compare_cols=compare_cols,
+                compare_digests=compare_digests,
+            )
+            for src_partition, dest_partition in zip(src_partitions, dest_partitions)
+        ]
+        diffs = [future.result() for future in futures]
     return RowDiff(
-        rows_added=rows_from_lookup_table(
-            lookup_table=added,
-            key_columns=common_key_cols,
-            value_columns=common_compare_cols,
-        ),
-        rows_deleted=rows_from_lookup_table(
-            lookup_table=deleted,
-            key_columns=common_key_cols,
-            value_columns=common_compare_cols,
+        rows_added=Rows.concat([diff.rows_added for diff in diffs]),
+        rows_deleted=Rows.concat([diff.rows_deleted for diff in diffs]),
+        rows_updated=Rows.concat([diff.rows_updated for diff in diffs]),
+    )
+
+
+def compare_sorted_rows(
+    *,
+    key_cols: typing.Set[str],
+    src_rows: RowSource,
+    dest_rows: RowSource,
+    compare_cols: typing.Optional[typing.Set[str]] = None,
+    compare_digests: bool = False,
+) -> RowDiff:
+    """Sort-merge counterpart to compare_rows for inputs ordered by their key columns
+
+    Both sides are read in a single forward pass, so only the current batch of each
+    side and the differences found are held in memory.  Raises RowsNotSorted if
+    either side is not ordered the way null_safe_key orders its keys.
+    """
+    common_key_cols, common_compare_cols = _common_columns(
+        key_cols=key_cols,
+        src_rows=src_rows,
+        dest_rows=dest_rows,
+        compare_cols=compare_cols,
+    )
+    added, deleted, updated = _diff_builders(
+        key_cols=common_key_cols,
+        compare_cols=common_compare_cols,
+        keys_only=compare_digests,
+    )
+    for key, src_values, dest_values in merge_sorted(
+        _keyed_values(
+            rs=src_rows, key_columns=common_key_cols, value_columns=common_compare_cols
         ),
-        rows_updated=rows_from_lookup_table(
-            lookup_table=updates,
-            key_columns=common_key_cols,
-            value_columns=common_compare_cols,
+        _keyed_values(
+            rs=dest_rows, key_columns=common_key_cols, value_columns=common_compare_cols
         ),
+    ):
+        if not dest_values:
+            added.append(key if compare_digests else key + src_values[-1])
+        elif not src_values:
+            deleted.append(key)
+        elif common_compare_cols and src_values[-1] != dest_values[-1]:
+            updated.append(key if compare_digests else key + src_values[-1])
+    return RowDiff(
+        rows_added=added.build(),
+        rows_deleted=deleted.build(),
+        rows_updated=updated.build(),
+    )
+
+
+def _common_columns(
+    *,
+    key_cols: typing.Set[str],
+    src_rows: RowSource,
+    dest_rows: RowSource,
+    compare_cols: typing.Optional[typing.Set[str]],
+) -> typing.Tuple[typing.Set[str], typing.Set[str]]:
+    src_cols = set(src_rows.column_names)
+    dest_cols = set(dest_rows.column_names)
+    if compare_cols is None:
+        common_cols = src_cols & dest_cols
+    else:
+        common_cols = key_cols | compare_cols
+    return key_cols & common_cols, common_cols - key_cols
+
+
+def _diff_builders(
+    *, key_cols: typing.Set[str], compare_cols: typing.Set[str], keys_only: bool
+) -> typing.Tuple[RowsBuilder, RowsBuilder, RowsBuilder]:
+    key_col_names = sorted(key_cols)
+    column_names = key_col_names if keys_only else key_col_names + sorted(compare_cols)
+    if not compare_cols:
+        warnings.warn(
+            "There were no common comparison columns, so no updates can be calculated."
+        )
+    return (
+        RowsBuilder(column_names=column_names),
+        RowsBuilder(column_names=key_col_names),
+        RowsBuilder(column_names=column_names),
     )
+
+
+def _keyed_values(
+    *,
+    rs: RowSource,
+    key_columns: typing.Set[str],
+    value_columns: typing.Set[str],
+) -> typing.Iterator[typing.Tuple[Row, Row]]:
+    key_col_names = sorted(key_columns)
+    value_col_names = sorted(value_columns)
+    if isinstance(rs, RowStream):
+        key_getter = row_getter(rs.column_indices(key_col_names))
+        value_getter = row_getter(rs.column_indices(value_col_names))
+        for chunk in rs.chunks():
+            yield from zip(map(key_getter, chunk), map(value_getter, chunk))
+    else:
+        yield from zip(
+            rs.iter_tuples(column_names=key_col_names),
+            rs.iter_tuples(column_names=value_col_names),
+        )
+
+
+def _lookup_table(
+    *,
+    rs: RowSource,
+    key_columns: typing.Set[str],
+    value_columns: typing.Set[str],
+    digests: bool,
+) -> typing.Dict[Row, typing.Any]:
+    if digests:
+        return {
+            key: stable_hash(values)
+            for key, values in _keyed_values(
+                rs=rs, key_columns=key_columns, value_columns=value_columns
+            )
+        }
+    elif isinstance(rs, RowStream):
+        key_indices = rs.column_indices(sorted(key_columns))
+        value_indices = rs.column_indices(sorted(value_columns))
+        lookup_table: typing.Dict[Row, Row] = {}
+        for chunk in rs.chunks():
+            lookup_table.update(
+                lookup_table_from_tuples(
+                    chunk, key_indices=key_indices, value_indices=value_indices
+                )
+            )
+        return lookup_table
+    else:
+        return rows_to_lookup_table(
+            rs=rs, key_columns=key_columns, value_columns=value_columns
+        )
@@ -6,15 +6,26 @@ import typing
 import pyodbc
 
 from py_db_adapter.domain import (
+    arrow_interop,
+    column_storage,
+    data_types,
+    dictionary_column,
     exceptions,
     logger as domain_logger,
+    memory_tracker,
+    row_stream as domain_row_stream,
     rows as domain_rows,
+    spill,
     sql_adapter,
     sql_formatter,
     sql_predicate,
     table as domain_table,
+    typed_column,
 )
 
+if typing.TYPE_CHECKING:
+    import pyarrow
+
 __all__ = ("DbAdapter",)
 
 
@@ -30,7 +41,7 @@ class DbAdapter(abc.ABC):
         cur: pyodbc.Cursor,
         schema_name: typing.Optional[str],
         table_name: str,
-        rows: domain_rows.Rows,
+        rows: domain_row_stream.RowSource,
         batch_size: int,
     ) -> None:
         for batch in rows.batches(batch_size):
@@ -43,6 +54,40 @@ class DbAdapter(abc.ABC):
             params = batch.as_tuples()
             cur.executemany(sql, params)
 
+    def bucket_checksums(
+        self,
+        *,
+        cur: pyodbc.Cursor,
+        table: domain_table.Table,
+        key_column: str,
+        checksum_cols: typing.Set[str],
+        key_ranges: typing.Sequence[typing.Tuple[int, int]],
+        offset: int,
+        width: int,
+    ) -> typing.Dict[int, typing.Tuple[int, int]]:
+        """Count and checksum the rows in key_ranges in buckets of width keys
+
+        Bucket n holds the keys from offset + n * width up to the start of the next.
+        """
+        sql = self._sql_adapter.select_bucket_checksums(
+            schema_name=table.schema_name,
+            table_name=table.table_name,
+            key_column=key_column,
+            checksum_columns=[
+                table.column_by_name(col_name) for col_name in sorted(checksum_cols)
+            ],
+            key_ranges=key_ranges,
+            offset=offset,
+            width=width,
+        )
+        rows = fetch_rows(cur=cur, sql=sql, params=None)
+        return {
+            int(bucket): (int(row_count), int(checksum))
+            for bucket, row_count, checksum in rows.iter_tuples(
+                column_names=["bucket", "row_count", "checksum"]
+            )
+        }
+
     def create_table(self, *, cur: pyodbc.Cursor, table: domain_table.Table) -> bool:
         if self.table_exists(
             cur=cur, table_name=table.table_name, schema_name=table.schema_name
@@ -123,6 +168,7 @@ class DbAdapter(abc.ABC):
         rows: domain_rows.Rows,
         cols: typing.Optional[typing.Set[str]] = None,
         batch_size: int,
+        memory_budget: typing.Optional[spill.MemoryBudget] = None,
     ) -> domain_rows.Rows:
         pk_cols = {
             col for col in table.columns if col.column_name in table.primary_key.columns
@@ -136,10 +182,28 @@ class DbAdapter(abc.ABC):
                 pk_cols=pk_cols,
                 select_cols=cols,
             )
-            row_batch = fetch_rows(cur=cur, sql=sql, params=None)
+            row_batch = fetch_rows(
+                cur=cur,
+                sql=sql,
+                params=None,
+                column_types=_column_types(table, cols),
+                memory_budget=memory_budget,
+            )
             batches.append(row_batch)
         return domain_rows.Rows.concat(batches)
 
+    def key_range(
+        self, *, cur: pyodbc.Cursor, table: domain_table.Table, key_column: str
+    ) -> typing.Tuple[typing.Optional[int], typing.Optional[int]]:
+        """Smallest and largest value of key_column, or Nones if the table is empty"""
+        sql = self._sql_adapter.key_range(
+            schema_name=table.schema_name,
+            table_name=table.table_name,
+            key_column=key_column,
+        )
+        min_key, max_key = cur.execute(sql).fetchone()
+        return min_key, max_key
+
     def row_count(
         self,
         *,
@@ -158,13 +222,20 @@ class DbAdapter(abc.ABC):
         cur: pyodbc.Cursor,
         table: domain_table.Table,
         columns: typing.Optional[typing.Set[str]] = None,
+        memory_budget: typing.Optional[spill.MemoryBudget] = None,
     ) -> domain_rows.Rows:
         sql = self._sql_adapter.select_all_rows(
             schema_name=table.schema_name,
             table_name=table.table_name,
             columns=columns,
         )
-        return fetch_rows(cur=cur, sql=sql, params=None)
+        return fetch_rows(
+            cur=cur,
+            sql=sql,
+            params=None,
+            column_types=_column_types(table, columns),
+            memory_budget=memory_budget,
+        )
 
     def select_where(
         self,
@@ -172,9 +243,83 @@ class DbAdapter(abc.ABC):
         cur: pyodbc.Cursor,
         table: domain_table.Table,
         predicate: sql_predicate.SqlPredicate,
+        memory_budget: typing.Optional[spill.MemoryBudget] = None,
     ) -> domain_rows.Rows:
         sql = self._sql_adapter.select_rows_where(table=table, predicate=predicate)
-        return fetch_rows(cur=cur, sql=sql, params=None)
+        return fetch_rows(
+            cur=cur,
+            sql=sql,
+            params=None,
+            column_types=_column_types(table),
+            memory_budget=memory_budget,
+        )
+
+    def select_all_arrow(
+        self,
+        *,
+        cur: pyodbc.Cursor,
+        table: domain_table.Table,
+        columns: typing.Optional[typing.Set[str]] = None,
+        batch_size: int = 1_000,
+    ) -> typing.Generator[pyarrow.RecordBatch, typing.Any, None]:
+        col_names = sorted(columns or table.column_names)
+        sql = self._sql_adapter.select_all_rows(
+            schema_name=table.schema_name,
+            table_name=table.table_name,
+            columns=set(col_names),
+        )
+        return fetch_record_batches(
+            cur=cur,
+            sql=sql,
+            arraysize=batch_size,
+            schema=arrow_interop.arrow_schema(table, column_names=col_names),
+        )
+
+    def stream_all(
+        self,
+        *,
+        cur: pyodbc.Cursor,
+        table: domain_table.Table,
+        columns: typing.Optional[typing.Set[str]] = None,
+        batch_size: int = 1_000,
+    ) -> domain_row_stream.RowStream:
+        sql = self._sql_adapter.select_all_rows(
+            schema_name=table.schema_name,
+            table_name=table.table_name,
+            columns=columns,
+        )
+        return stream_rows(cur=cur, sql=sql, arraysize=batch_size)
+
+    def stream_table_keys(
+        self,
+        *,
+        cur: pyodbc.Cursor,
+        table: domain_table.Table,
+        additional_cols: typing.Optional[typing.Set[str]],
+        batch_size: int = 10_000,
+        row_hash: bool = False,
+    ) -> domain_row_stream.RowStream:
+        """Stream the distinct keys of a table ordered by its primary key columns"""
+        order_by = sorted(table.primary_key.columns)
+        if row_hash and additional_cols:
+            sql = self._sql_adapter.select_row_hashes(
+                schema_name=table.schema_name,
+                table_name=table.table_name,
+                key_columns=order_by,
+                hash_columns=[
+                    table.column_by_name(col_name)
+                    for col_name in sorted(additional_cols)
+                ],
+                order_by=order_by,
+            )
+        else:
+            sql = self._sql_adapter.select_distinct_rows(
+                schema_name=table.schema_name,
+                table_name=table.table_name,
+                columns=set(table.primary_key.columns) | (additional_cols or set()),
+                order_by=order_by,
+            )
+        return stream_rows(cur=cur, sql=sql, arraysize=batch_size)
 
     @abc.abstractmethod
     def table_exists(
@@ -196,7 +341,32 @@ class DbAdapter(abc.ABC):
         cur: pyodbc.Cursor,
         table: domain_table.Table,
         additional_cols: typing.Optional[typing.Set[str]],
+        memory_budget: typing.Optional[spill.MemoryBudget] = None,
+        row_hash: bool = False,
     ) -> domain_rows.Rows:
+        """Fetch the distinct keys of a table along with the additional columns
+
+        If row_hash is True, the database hashes the additional columns into a single
+        row_hash column, so only the keys and the hash are sent over the wire.
+        """
+        if row_hash and additional_cols:
+            sql = self._sql_adapter.select_row_hashes(
+                schema_name=table.schema_name,
+                table_name=table.table_name,
+                key_columns=sorted(table.primary_key.columns),
+                hash_columns=[
+                    table.column_by_name(col_name)
+                    for col_name in sorted(additional_cols)
+                ],
+            )
+            return fetch_rows(
+                cur=cur,
+                sql=sql,
+                params=None,
+                column_types=_column_types(table, set(table.primary_key.columns)),
+                memory_budget=memory_budget,
+            )
+
         cols = (
             set(table.primary_key.columns) | additional_cols
             if additional_cols
@@ -207,11 +377,38 @@ class DbAdapter(abc.ABC):
             table_name=table.table_name,
             columns=cols,
         )
-        result = fetch_rows(cur=cur, sql=sql, params=None)
+        result = fetch_rows(
+            cur=cur,
+            sql=sql,
+            params=None,
+            column_types=_column_types(table, cols),
+            memory_budget=memory_budget,
+        )
         return result.subset(
             column_names=(set(table.primary_key.columns) | set(additional_cols or []))
         )
 
+    def table_keys_in_ranges(
+        self,
+        *,
+        cur: pyodbc.Cursor,
+        table: domain_table.Table,
+        key_column: str,
+        additional_cols: typing.Optional[typing.Set[str]],
+        key_ranges: typing.Sequence[typing.Tuple[int, int]],
+    ) -> domain_rows.Rows:
+        cols = {key_column} | (additional_cols or set())
+        sql = self._sql_adapter.select_rows_in_key_ranges(
+            schema_name=table.schema_name,
+            table_name=table.table_name,
+            key_column=key_column,
+            columns=cols,
+            key_ranges=key_ranges,
+        )
+        return fetch_rows(
+            cur=cur, sql=sql, params=None, column_types=_column_types(table, cols)
+        )
+
     def truncate_table(
         self, *, cur: pyodbc.Cursor, schema_name: typing.Optional[str], table_name: str
     ) -> None:
@@ -243,12 +440,8 @@ class DbAdapter(abc.ABC):
             non_pk_cols = sorted(
                 col for col in column_names if col not in table.primary_key.columns
             )
-            unordered_params = batch.as_dicts()
-            param_order = non_pk_cols + pk_cols
-            ordered_params = [
-                tuple(row[k] for k in param_order) for row in unordered_params
-            ]
-            cur.executemany(sql, ordered_params)
+            params = batch.as_tuples(column_names=non_pk_cols + pk_cols)
+            cur.executemany(sql, params)
 
     @property
     @abc.abstractmethod
@@ -261,7 +454,19 @@ def fetch_rows(
     cur: pyodbc.Cursor,
     sql: str,
     params: typing.Optional[typing.List[typing.Tuple[typing.Any, ...]]] = None,
+    column_types: typing.Optional[typing.Dict[str, data_types.DataType]] = None,
+    arraysize: int = 10_000,
+    memory_budget: typing.Optional[spill.MemoryBudget] = None,
 ) -> domain_rows.Rows:
+    """Fetch the results of a query
+
+    Text columns listed in column_types are dictionary-encoded as chunks arrive, so
+    repeated values share a single object, and int, float, bool, date and datetime
+    columns are packed into typed arrays.  If a memory_budget is provided, chunks
+    that do not fit in it are spilled to disk.  If there is an active MemoryTracker,
+    the size of the data kept in memory is reported to it as each chunk arrives, so
+    a fetch that goes past its limit stops early.
+    """
     std_sql = sql_formatter.standardize_sql(sql)
     logger.debug(f"FETCH:\n\t{std_sql}\n\tparams={params}")
     if params is None:
@@ -272,13 +477,133 @@ def fetch_rows(
         result = cur.execute(std_sql, params[0])
 
     column_names = [description[0] for description in cur.description]
-    if rows := result.fetchall():
-        return domain_rows.Rows(
-            column_names=column_names, rows=[tuple(row) for row in rows]
-        )
-    else:
-        return domain_rows.Rows(column_names=column_names, rows=[])
+    column_types = column_types or {}
+    typed_kinds = typed_column.typed_column_kinds()
+    encoded_types: typing.Dict[int, data_types.DataType] = {}
+    for i, col_name in enumerate(column_names):
+        data_type = column_types.get(col_name)
+        if data_type is not None and (
+            data_type == data_types.DataType.Text or data_type in typed_kinds
+        ):
+            encoded_types[i] = data_type
+
+    tracker = memory_tracker.current_memory_tracker()
+    if memory_budget is None and not encoded_types and tracker is None:
+        return domain_rows.Rows(column_names=column_names, rows=result.fetchall())
+
+    # Without a budget each encoder spans its whole column, so a dictionary is shared
+    # by every row.  With a budget each chunk is encoded on its own, so that the
+    # encoded chunk can be spilled.
+    encoders = (
+        {i: _encoder(data_type) for i, data_type in encoded_types.items()}
+        if memory_budget is None
+        else {}
+    )
+    chunks: typing.List[typing.List[typing.Sequence[typing.Any]]] = [
+        [] for _ in column_names
+    ]
+    while chunk := result.fetchmany(arraysize):
+        for i, values in enumerate(zip(*chunk)):
+            stored: typing.Sequence[typing.Any] = values
+            if i in encoders:
+                nbytes = encoders[i].nbytes
+                encoders[i].extend(values)
+                if tracker is not None:
+                    # only the growth of the encoded column is new memory
+                    tracker.add(encoders[i].nbytes - nbytes)
+                continue
+            if memory_budget is None:
+                chunks[i].append(values)
+            elif i in encoded_types:
+                encoder = _encoder(encoded_types[i])
+                encoder.extend(values)
+                encoded = encoder.finish()
+                stored = memory_budget.store(
+                    encoded, nbytes=column_storage.column_nbytes(encoded)
+                )
+                chunks[i].append(stored)
+            else:
+                stored = memory_budget.store(values)
+                chunks[i].append(stored)
+            if tracker is not None:
+                tracker.add(column_storage.column_nbytes(stored))
+    return domain_rows.Rows.from_columns(
+        column_names=column_names,
+        columns=[
+            (
+                encoders[i].finish()
+                if i in encoders
+                else column_storage.ChunkedColumn(chunks[i])
+            )
+            for i in range(len(column_names))
+        ],
+    )
+
+
+def fetch_record_batches(
+    *,
+    cur: pyodbc.Cursor,
+    sql: str,
+    arraysize: int = 1_000,
+    schema: typing.Optional[pyarrow.Schema] = None,
+) -> typing.Generator[pyarrow.RecordBatch, typing.Any, None]:
+    """Arrow counterpart to fetch_rows that yields one RecordBatch per chunk"""
+    pa = arrow_interop.import_pyarrow()
+    std_sql = sql_formatter.standardize_sql(sql)
+    logger.debug(f"FETCH ARROW:\n\t{std_sql}")
+    cur.execute(std_sql)
+    column_names = [description[0] for description in cur.description]
+    if schema is not None:
+        schema = pa.schema([schema.field(col_name) for col_name in column_names])
+    while chunk := cur.fetchmany(arraysize):
+        arrays = [
+            pa.array(col, type=None if schema is None else schema.field(i).type)
+            for i, col in enumerate(zip(*chunk))
+        ]
+        if schema is None:
+            yield pa.RecordBatch.from_arrays(arrays, names=column_names)
+        else:
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def stream_rows(
+    *,
+    cur: pyodbc.Cursor,
+    sql: str,
+    arraysize: int = 1_000,
+) -> domain_row_stream.RowStream:
+    std_sql = sql_formatter.standardize_sql(sql)
+    logger.debug(f"STREAM:\n\t{std_sql}")
+    cur.execute(std_sql)
+    return domain_row_stream.RowStream(cur=cur, arraysize=arraysize)
 
 
 def parameter_placeholder(column_name: str, /) -> str:
     return "?"
+
+
+def _column_types(
+    table: domain_table.Table, columns: typing.Optional[typing.Set[str]] = None, /
+) -> typing.Dict[str, data_types.DataType]:
+    """Data types that fetch_rows uses to pick a compact storage for each column
+
+    Text primary key columns are left out, since unique values gain nothing from
+    dictionary encoding.
+    """
+    return {
+        col.column_name: col.data_type
+        for col in table.columns
+        if (columns is None or col.column_name in columns)
+        and not (
+            col.column_name in table.primary_key.columns
+            and col.data_type == data_types.DataType.Text
+        )
+    }
+
+
+def _encoder(
+    data_type: data_types.DataType, /
+) -> typing.Union[dictionary_column.DictionaryEncoder, typed_column.TypedColumnEncoder]:
+    if data_type == data_types.DataType.Text:
+        return dictionary_column.DictionaryEncoder()
+    return typed_column.TypedColumnEncoder(data_type)
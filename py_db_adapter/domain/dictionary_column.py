@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import array
+import itertools
+import pickle
+import sys
+import typing
+
+__all__ = ("DictionaryColumn", "DictionaryEncoder", "dictionary_encode")
+
+
+class DictionaryColumn(typing.Sequence[typing.Any]):
+    """Column stored as integer codes into a table of distinct values
+
+    Every row that holds the same value shares one object from the dictionary, and
+    two columns that share a dictionary are compared on their codes.
+    """
+
+    __slots__ = ("_codes", "_dictionary")
+
+    def __init__(
+        self,
+        codes: typing.Union[array.array[int], memoryview],
+        dictionary: typing.List[typing.Any],
+    ):
+        self._codes = codes
+        self._dictionary = dictionary
+
+    @property
+    def codes(self) -> typing.Union[array.array[int], memoryview]:
+        return self._codes
+
+    @property
+    def dictionary(self) -> typing.List[typing.Any]:
+        return self._dictionary
+
+    def take(self, /, positions: typing.Sequence[int]) -> DictionaryColumn:
+        codes = memoryview(self._codes)
+        return DictionaryColumn(
+            array.array(codes.format, map(codes.__getitem__, positions)),
+            self._dictionary,
+        )
+
+    def view(self, /, offset: int, length: int) -> DictionaryColumn:
+        return DictionaryColumn(
+            memoryview(self._codes)[offset : offset + length], self._dictionary
+        )
+
+    @typing.overload
+    def __getitem__(self, ix: int) -> typing.Any:
+        ...
+
+    @typing.overload
+    def __getitem__(self, ix: slice) -> typing.Sequence[typing.Any]:
+        ...
+
+    def __getitem__(
+        self, ix: typing.Union[int, slice]
+    ) -> typing.Union[typing.Any, typing.Sequence[typing.Any]]:
+        if isinstance(ix, slice):
+            return DictionaryColumn(self._codes[ix], self._dictionary)
+        return self._dictionary[self._codes[ix]]
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        return map(self._dictionary.__getitem__, self._codes)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __reduce_ex__(
+        self, protocol: typing.SupportsIndex
+    ) -> typing.Tuple[typing.Any, ...]:
+        # With protocol 5 the codes are handed to pickle as a buffer.  Only a pickler
+        # given a buffer_callback sends it out-of-band; others, including the one
+        # ProcessPoolExecutor uses, copy it into the stream as one block of bytes.
+        codes = memoryview(self._codes)
+        if int(protocol) >= 5:
+            return (
+                _dictionary_column_from_buffer,
+                (pickle.PickleBuffer(codes), codes.format, self._dictionary),
+            )
+        return DictionaryColumn, (array.array(codes.format, codes), self._dictionary)
+
+    def __repr__(self) -> str:
+        return (
+            f"<DictionaryColumn: {len(self._dictionary)} distinct values, "
+            f"length={len(self._codes)}>"
+        )
+
+
+class DictionaryEncoder:
+    """Incrementally dictionary-encode a column as chunks of values arrive
+
+    Once sample_size values have arrived, the encoder checks after each chunk whether
+    the ratio of distinct values to rows exceeds max_cardinality_ratio.  If it does,
+    the encoder gives up on the dictionary and keeps the values as plain objects, so
+    a high-cardinality column does not hold a lookup table and codes it won't use.
+    """
+
+    def __init__(self, /, max_cardinality_ratio: float = 0.5, sample_size: int = 1_000):
+        self._max_cardinality_ratio = max_cardinality_ratio
+        self._sample_size = sample_size
+        self._lookup: typing.Dict[typing.Any, int] = {}
+        self._codes: array.array[int] = array.array("I")
+        self._dictionary_nbytes = 0
+        self._fallback: typing.Optional[typing.List[typing.Any]] = None
+        self._fallback_nbytes = 0
+
+    def extend(self, /, values: typing.Iterable[typing.Any]) -> None:
+        if self._fallback is not None:
+            start = len(self._fallback)
+            self._fallback.extend(values)
+            added = self._fallback[start:]
+            self._fallback_nbytes += 8 * len(added) + sum(map(sys.getsizeof, added))
+            return
+
+        lookup = self._lookup
+        distinct = len(lookup)
+        self._codes.extend(lookup.setdefault(v, len(lookup)) for v in values)
+        if len(lookup) > distinct:
+            new_values = itertools.islice(reversed(lookup), len(lookup) - distinct)
+            self._dictionary_nbytes += sum(map(sys.getsizeof, new_values))
+        if len(self._codes) >= self._sample_size and self._too_many_distinct():
+            self._fall_back()
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated size of the encoded column, as it grows with each chunk"""
+        if self._fallback is not None:
+            return self._fallback_nbytes
+        return (
+            memoryview(self._codes).nbytes
+            + 8 * len(self._lookup)
+            + self._dictionary_nbytes
+        )
+
+    def finish(self) -> typing.Sequence[typing.Any]:
+        """Return the encoded column
+
+        If the ratio of distinct values to rows exceeds max_cardinality_ratio, the
+        values are returned as a plain tuple, since encoding would not save anything.
+        """
+        if self._fallback is None and self._too_many_distinct():
+            self._fall_back()
+        if self._fallback is not None:
+            return tuple(self._fallback)
+        return DictionaryColumn(self._codes, list(self._lookup))
+
+    def _fall_back(self) -> None:
+        dictionary = list(self._lookup)
+        self._fallback = list(map(dictionary.__getitem__, self._codes))
+        self._fallback_nbytes = 8 * len(self._fallback) + self._dictionary_nbytes
+        self._lookup = {}
+        self._codes = array.array("I")
+        self._dictionary_nbytes = 0
+
+    def _too_many_distinct(self) -> bool:
+        return len(self._lookup) > self._max_cardinality_ratio * len(self._codes)
+
+
+def dictionary_encode(
+    values: typing.Iterable[typing.Any],
+    /,
+    max_cardinality_ratio: float = 0.5,
+) -> typing.Sequence[typing.Any]:
+    encoder = DictionaryEncoder(max_cardinality_ratio)
+    encoder.extend(values)
+    return encoder.finish()
+
+
+def _dictionary_column_from_buffer(
+    buffer: typing.Any, fmt: str, dictionary: typing.List[typing.Any], /
+) -> DictionaryColumn:
+    codes = memoryview(buffer).cast("B").cast(fmt)  # type: ignore[call-overload]
+    return DictionaryColumn(codes, dictionary)
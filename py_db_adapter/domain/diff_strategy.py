@@ -0,0 +1,20 @@
+import enum
+
+__all__ = ("DiffStrategy",)
+
+
+class DiffStrategy(enum.Enum):
+    """How the keys of two tables are compared
+
+    Lookup holds both key scans in dict lookup tables.  SortMerge pulls both scans
+    ordered by the primary key and merges them in one pass, so memory is bounded by
+    the batch size and the number of differences.  BucketedChecksum has each database
+    count and checksum its rows per range of a single integer key, then narrows the
+    ranges down to the buckets that differ before fetching any keys.  Parallel fetches
+    the keys like Lookup, then diffs hash partitions of them in a process pool.
+    """
+
+    BucketedChecksum = "bucketed_checksum"
+    Lookup = "lookup"
+    Parallel = "parallel"
+    SortMerge = "sort_merge"
@@ -4,10 +4,16 @@ import typing
 
 __all__ = (
     "PyDbAdapterException",
+    "ColumnLengthMismatch",
     "DatabaseIsReadOnly",
     "InvalidCustomPrimaryKey",
+    "MemoryLimitExceeded",
+    "MissingOptionalDependency",
     "MissingPrimaryKey",
     "parse_traceback",
+    "RowStreamConsumed",
+    "RowsNotSorted",
+    "RowWidthMismatch",
     "TableDoesNotExist",
     "TableMissingPrimaryKey",
     "TableHasNoColumns",
@@ -19,6 +25,18 @@ class PyDbAdapterException(Exception):
         super().__init__(message)
 
 
+class ColumnLengthMismatch(PyDbAdapterException):
+    def __init__(self, *, column_name: str, expected_length: int, actual_length: int):
+        self.column_name = column_name
+        self.expected_length = expected_length
+        self.actual_length = actual_length
+        msg = (
+            f"The values provided for {column_name} have {actual_length} items, but the "
+            f"rows have {expected_length}."
+        )
+        super().__init__(msg)
+
+
 class ColumnNameNotFound(PyDbAdapterException):
     def __init__(
         self, column_name: str, table_name: str, available_cols: typing.Set[str]
@@ -60,6 +78,27 @@ class InvalidSqlGenerated(PyDbAdapterException):
         super().__init__(message)
 
 
+class MemoryLimitExceeded(PyDbAdapterException):
+    def __init__(self, *, used: int, limit: int):
+        self.used = used
+        self.limit = limit
+        super().__init__(
+            f"The data fetched so far takes up an estimated {used} bytes, which is more "
+            f"than the limit of {limit} bytes."
+        )
+
+
+class MissingOptionalDependency(PyDbAdapterException):
+    def __init__(self, *, package: str, extra: str) -> None:
+        self.package = package
+        self.extra = extra
+        msg = (
+            f"{package} is required for this feature.  Install it with the {extra} extra, "
+            f"e.g. pip install py-db-adapter[{extra}]."
+        )
+        super().__init__(msg)
+
+
 class MissingPrimaryKey(PyDbAdapterException):
     def __init__(self, schema_name: typing.Optional[str], table_name: str) -> None:
         full_table_name = f"{schema_name}.{table_name}" if schema_name else table_name
@@ -83,6 +122,27 @@ class NoCommonKeyColumns(PyDbAdapterException):
         super().__init__(msg)
 
 
+class RowStreamConsumed(PyDbAdapterException):
+    def __init__(self) -> None:
+        super().__init__("The RowStream has already been consumed.")
+
+
+class RowsNotSorted(PyDbAdapterException):
+    def __init__(self, *, side: str) -> None:
+        self.side = side
+        super().__init__(f"The {side} input is not sorted by its key columns.")
+
+
+class RowWidthMismatch(PyDbAdapterException):
+    def __init__(self, *, expected_width: int, actual_width: int):
+        self.expected_width = expected_width
+        self.actual_width = actual_width
+        msg = (
+            f"A row has {actual_width} values, but there are {expected_width} columns."
+        )
+        super().__init__(msg)
+
+
 class SchemaIsRequired(PyDbAdapterException):
     def __init__(self, message: str) -> None:
         super().__init__(message)
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import typing
+
+from py_db_adapter.domain import exceptions
+
+__all__ = ("MemoryTracker", "current_memory_tracker", "track_memory")
+
+
+class MemoryTracker:
+    """Running total of the bytes fetched while it is active
+
+    fetch_rows reports the estimated size of each chunk it keeps in memory, so a job
+    can stop as soon as it goes past its limit instead of being killed by the OS.
+    """
+
+    def __init__(self, /, limit: typing.Optional[int] = None):
+        self._limit = limit
+        self._used = 0
+
+    def add(self, /, nbytes: int) -> None:
+        self._used += nbytes
+        if self._limit is not None and self._used > self._limit:
+            raise exceptions.MemoryLimitExceeded(used=self._used, limit=self._limit)
+
+    @property
+    def limit(self) -> typing.Optional[int]:
+        return self._limit
+
+    @property
+    def used(self) -> int:
+        return self._used
+
+    def __repr__(self) -> str:
+        return f"<MemoryTracker: used={self._used}, limit={self._limit}>"
+
+
+_current_tracker: contextvars.ContextVar[
+    typing.Optional[MemoryTracker]
+] = contextvars.ContextVar("memory_tracker", default=None)
+
+
+def current_memory_tracker() -> typing.Optional[MemoryTracker]:
+    return _current_tracker.get()
+
+
+@contextlib.contextmanager
+def track_memory(
+    limit: typing.Optional[int] = None,
+) -> typing.Generator[MemoryTracker, None, None]:
+    """Account for the data fetched within the block"""
+    tracker = MemoryTracker(limit)
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
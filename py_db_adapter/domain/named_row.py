@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import typing
+
+__all__ = ("NamedRow",)
+
+
+class NamedRow(typing.Mapping[str, typing.Any]):
+    """Read-only row that supports access by column name
+
+    The column index map is shared with the parent Rows, so a NamedRow only holds a
+    reference to its values and to that map.
+    """
+
+    __slots__ = ("_values", "_column_indices")
+
+    def __init__(
+        self,
+        values: typing.Sequence[typing.Any],
+        column_indices: typing.Dict[str, int],
+    ):
+        self._values = values
+        self._column_indices = column_indices
+
+    def as_tuple(self) -> typing.Tuple[typing.Any, ...]:
+        return tuple(self._values)
+
+    def __contains__(self, column_name: object) -> bool:
+        return column_name in self._column_indices
+
+    def __getitem__(self, column_name: str) -> typing.Any:
+        return self._values[self._column_indices[column_name]]
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._column_indices)
+
+    def __len__(self) -> int:
+        return len(self._column_indices)
+
+    def __repr__(self) -> str:
+        items = ", ".join(
+            f"{k}={v!r}" for k, v in zip(self._column_indices, self._values)
+        )
+        return f"<NamedRow: {items}>"
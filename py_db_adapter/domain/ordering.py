@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import itertools
+import typing
+
+from py_db_adapter.domain import exceptions
+
+__all__ = ("merge_sorted", "null_safe_key")
+
+Key = typing.Tuple[typing.Any, ...]
+T = typing.TypeVar("T")
+U = typing.TypeVar("U")
+
+
+def null_safe_key(key: Key, /) -> typing.Tuple[typing.Tuple[bool, typing.Any], ...]:
+    """Sort key for a tuple of values that may hold NULLs
+
+    NULLs sort before every other value, so keys with missing values can still be
+    ordered and compared without a TypeError.
+    """
+    return tuple((value is not None, value) for value in key)
+
+
+def merge_sorted(
+    left: typing.Iterable[typing.Tuple[Key, T]],
+    right: typing.Iterable[typing.Tuple[Key, U]],
+    /,
+) -> typing.Iterator[typing.Tuple[Key, typing.List[T], typing.List[U]]]:
+    """Walk two inputs sorted by null_safe_key(key) in a single pass
+
+    Yields each distinct key along with the items that carry it on either side, so a
+    key found on one side only comes back with an empty list for the other.  Only
+    one group from each side is held in memory at a time.
+    """
+    left_groups = _sorted_groups(left, side="left")
+    right_groups = _sorted_groups(right, side="right")
+    left_group = next(left_groups, None)
+    right_group = next(right_groups, None)
+    while left_group is not None and right_group is not None:
+        left_sort_key, left_key, left_items = left_group
+        right_sort_key, right_key, right_items = right_group
+        if left_sort_key == right_sort_key:
+            yield left_key, left_items, right_items
+            left_group = next(left_groups, None)
+            right_group = next(right_groups, None)
+        elif left_sort_key < right_sort_key:
+            yield left_key, left_items, []
+            left_group = next(left_groups, None)
+        else:
+            yield right_key, [], right_items
+            right_group = next(right_groups, None)
+    while left_group is not None:
+        yield left_group[1], left_group[2], []
+        left_group = next(left_groups, None)
+    while right_group is not None:
+        yield right_group[1], [], right_group[2]
+        right_group = next(right_groups, None)
+
+
+def _sorted_groups(
+    items: typing.Iterable[typing.Tuple[Key, T]], /, side: str
+) -> typing.Iterator[
+    typing.Tuple[typing.Tuple[typing.Tuple[bool, typing.Any], ...], Key, typing.List[T]]
+]:
+    prior: typing.Optional[typing.Tuple[typing.Tuple[bool, typing.Any], ...]] = None
+    for sort_key, group in itertools.groupby(
+        items, key=lambda item: null_safe_key(item[0])
+    ):
+        if prior is not None and sort_key < prior:
+            raise exceptions.RowsNotSorted(side=side)
+        prior = sort_key
+        values = list(group)
+        yield sort_key, values[0][0], [value for _, value in values]
@@ -6,7 +6,9 @@ from py_db_adapter.domain import (
     db_adapter,
     exceptions,
     logger as domain_logger,
+    row_stream as domain_row_stream,
     rows as domain_rows,
+    spill,
     sql_predicate,
     table as domain_table,
 )
@@ -27,6 +29,7 @@ class Repository:
         change_tracking_columns: typing.Optional[typing.Iterable[str]] = None,
         read_only: bool = False,
         batch_size: int = 1_000,
+        memory_budget: typing.Optional[spill.MemoryBudget] = None,
     ):
         self._db = db
         self._table = table
@@ -35,8 +38,9 @@ class Repository:
         )
         self._read_only = read_only
         self._batch_size = batch_size
+        self._memory_budget = memory_budget
 
-    def add(self, *, cur: pyodbc.Cursor, rows: domain_rows.Rows) -> None:
+    def add(self, *, cur: pyodbc.Cursor, rows: domain_row_stream.RowSource) -> None:
         if self._read_only:
             raise exceptions.DatabaseIsReadOnly()
         else:
@@ -51,7 +55,12 @@ class Repository:
     def all(
         self, *, cur: pyodbc.Cursor, columns: typing.Optional[typing.Set[str]] = None
     ) -> domain_rows.Rows:
-        return self._db.select_all(cur=cur, table=self._table, columns=columns)
+        return self._db.select_all(
+            cur=cur,
+            table=self._table,
+            columns=columns,
+            memory_budget=self._memory_budget,
+        )
 
     def create(self, *, cur: pyodbc.Cursor) -> bool:
         if self._read_only:
@@ -93,6 +102,7 @@ class Repository:
             rows=rows,
             cols=cols,
             batch_size=self._batch_size,
+            memory_budget=self._memory_budget,
         )
 
     def keys(
@@ -102,7 +112,10 @@ class Repository:
         additional_cols: typing.Optional[typing.Set[str]] = None,
     ) -> domain_rows.Rows:
         return self._db.table_keys(
-            cur=cur, table=self._table, additional_cols=additional_cols
+            cur=cur,
+            table=self._table,
+            additional_cols=additional_cols,
+            memory_budget=self._memory_budget,
         )
 
     def row_count(self, *, cur: pyodbc.Cursor) -> int:
@@ -113,6 +126,16 @@ class Repository:
             schema_name=self._table.schema_name,
         )
 
+    def stream_all(
+        self, *, cur: pyodbc.Cursor, columns: typing.Optional[typing.Set[str]] = None
+    ) -> domain_row_stream.RowStream:
+        return self._db.stream_all(
+            cur=cur,
+            table=self._table,
+            columns=columns,
+            batch_size=self._batch_size,
+        )
+
     def truncate(self, *, cur: pyodbc.Cursor) -> None:
         if self._read_only:
             raise exceptions.DatabaseIsReadOnly()
@@ -144,4 +167,9 @@ class Repository:
     def where(
         self, *, cur: pyodbc.Cursor, predicate: sql_predicate.SqlPredicate
     ) -> domain_rows.Rows:
-        return self._db.select_where(cur=cur, table=self._table, predicate=predicate)
+        return self._db.select_where(
+            cur=cur,
+            table=self._table,
+            predicate=predicate,
+            memory_budget=self._memory_budget,
+        )
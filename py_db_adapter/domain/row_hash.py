@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import datetime
+import decimal
+import hashlib
+import typing
+
+__all__ = (
+    "add_hash_sums",
+    "encode_key",
+    "hash_buckets",
+    "ordered_digest",
+    "row_hash_sum",
+    "stable_hash",
+    "unordered_digest",
+)
+
+_DIGEST_SIZE = 16
+_HASH_SUM_MODULUS = 2 ** (_DIGEST_SIZE * 8)
+
+Key = typing.Tuple[typing.Any, ...]
+
+
+def add_hash_sums(hash_sums: typing.Iterable[int], /) -> int:
+    """row_hash_sum of a concatenation, given the sums of its parts"""
+    return sum(hash_sums) % _HASH_SUM_MODULUS
+
+
+def encode_key(key: Key, /) -> bytes:
+    """Canonical byte encoding of a tuple of values
+
+    Values that compare equal in Python encode the same way, so 1, 1.0 and
+    Decimal("1") all produce the same bytes, as do 0 and Decimal("-0"), and aware
+    datetimes that name the same instant in different time zones.  Unlike hash(), the encoding does not
+    depend on the process it runs in.
+    """
+    parts = []
+    for value in key:
+        encoded = _encode_value(value)
+        parts.append(f"{len(encoded)}:{encoded}")
+    return "|".join(parts).encode("utf-8")
+
+
+def hash_buckets(
+    keys: typing.Iterable[Key], /, n: int
+) -> typing.List[typing.List[int]]:
+    """Positions of the keys, split into n buckets by stable_hash"""
+    if n < 1:
+        raise ValueError(f"The number of buckets must be at least 1, but got {n}.")
+    buckets: typing.List[typing.List[int]] = [[] for _ in range(n)]
+    for pos, key in enumerate(keys):
+        buckets[stable_hash(key) % n].append(pos)
+    return buckets
+
+
+def ordered_digest(
+    rows: typing.Iterable[Key], /, column_names: typing.Sequence[str]
+) -> str:
+    """Digest of the column names and rows that changes if the rows are reordered"""
+    digest = hashlib.blake2b(encode_key(tuple(column_names)), digest_size=_DIGEST_SIZE)
+    for row in rows:
+        digest.update(b"\n")
+        digest.update(encode_key(row))
+    return digest.hexdigest()
+
+
+def row_hash_sum(rows: typing.Iterable[Key], /) -> int:
+    """Sum of the rows' hashes, which does not depend on their order
+
+    Sums over disjoint sets of rows can be added together, so the sum of a
+    concatenation can be derived from the sums of its parts.
+    """
+    return add_hash_sums(stable_hash(row, digest_size=_DIGEST_SIZE) for row in rows)
+
+
+def stable_hash(key: Key, /, digest_size: int = 8) -> int:
+    """Hash of a key that is the same across runs and processes"""
+    return int.from_bytes(
+        hashlib.blake2b(encode_key(key), digest_size=digest_size).digest(), "big"
+    )
+
+
+def unordered_digest(
+    hash_sum: int, /, column_names: typing.Sequence[str], row_count: int
+) -> str:
+    """Digest of the column names and a row_hash_sum"""
+    digest = hashlib.blake2b(encode_key(tuple(column_names)), digest_size=_DIGEST_SIZE)
+    digest.update(f"\n{row_count}\n{hash_sum}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _encode_decimal(value: decimal.Decimal, /) -> str:
+    if value.is_zero():
+        return "n0"
+    elif value.is_finite():
+        return "n" + format(value.normalize(), "f")
+    return "n" + str(value)
+
+
+def _encode_value(value: typing.Any, /) -> str:
+    if value is None:
+        return "-"
+    elif isinstance(value, str):
+        return "s" + value
+    elif isinstance(value, int):
+        return f"n{value}"
+    elif isinstance(value, float):
+        if value.is_integer():
+            return f"n{int(value)}"
+        return _encode_decimal(decimal.Decimal(repr(value)))
+    elif isinstance(value, decimal.Decimal):
+        return _encode_decimal(value)
+    elif isinstance(value, datetime.datetime):
+        if value.utcoffset() is not None:
+            value = value.astimezone(datetime.timezone.utc)
+        return "t" + value.isoformat()
+    elif isinstance(value, datetime.date):
+        return "d" + value.isoformat()
+    elif isinstance(value, datetime.time):
+        return "h" + value.isoformat()
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        return "b" + bytes(value).hex()
+    else:
+        return "o" + str(value)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import typing
+
+__all__ = ("RowIndex",)
+
+Key = typing.Tuple[typing.Any, ...]
+
+
+class RowIndex:
+    """Hash index from key tuples to the positions of the rows holding them
+
+    Unique keys map straight to their position, and only duplicated keys keep a list.
+    """
+
+    def __init__(
+        self,
+        *,
+        column_names: typing.Sequence[str],
+        keys: typing.Iterable[Key],
+    ):
+        self._column_names = list(column_names)
+        self._positions: typing.Dict[Key, typing.Union[int, typing.List[int]]] = {}
+        for pos, key in enumerate(keys):
+            existing = self._positions.setdefault(key, pos)
+            if existing != pos:
+                if isinstance(existing, list):
+                    existing.append(pos)
+                else:
+                    self._positions[key] = [existing, pos]
+
+    @property
+    def column_names(self) -> typing.List[str]:
+        return self._column_names
+
+    def get(self, /, key: Key) -> typing.List[int]:
+        positions = self._positions.get(key)
+        if positions is None:
+            return []
+        elif isinstance(positions, list):
+            return positions
+        else:
+            return [positions]
+
+    def positions(self, /, keys: typing.Iterable[Key]) -> typing.List[int]:
+        """Positions of the rows matching any of the keys, in ascending order"""
+        matches: typing.List[int] = []
+        for key in keys:
+            positions = self._positions.get(key)
+            if positions is None:
+                continue
+            elif isinstance(positions, list):
+                matches.extend(positions)
+            else:
+                matches.append(positions)
+        matches.sort()
+        return matches
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __repr__(self) -> str:
+        return f"<RowIndex: {', '.join(self._column_names)}, {len(self)} keys>"
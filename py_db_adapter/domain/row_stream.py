@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import pathlib
+import typing
+
+import pyodbc
+
+from py_db_adapter.domain import (
+    arrow_interop,
+    exceptions,
+    rows as domain_rows,
+    table as domain_table,
+)
+
+__all__ = ("RowSource", "RowStream", "shares_connection")
+
+
+class RowStream:
+    """Forward-only result set that pulls rows from a cursor in chunks
+
+    Only the current chunk is held in memory, so a RowStream can be iterated once.
+    The cursor must not be reused until the stream has been consumed.
+    """
+
+    def __init__(self, *, cur: pyodbc.Cursor, arraysize: int = 1_000):
+        self._cur = cur
+        self._arraysize = arraysize
+        self._column_names = [description[0] for description in cur.description]
+        self._row_count = 0
+        self._consumed = False
+
+    @property
+    def arraysize(self) -> int:
+        return self._arraysize
+
+    def batches(
+        self, /, size: typing.Optional[int] = None
+    ) -> typing.Generator[domain_rows.Rows, typing.Any, None]:
+        for chunk in self.chunks(size):
+            yield domain_rows.Rows(column_names=self._column_names, rows=chunk)
+
+    def chunks(
+        self, /, size: typing.Optional[int] = None
+    ) -> typing.Generator[typing.List[domain_rows.Row], typing.Any, None]:
+        """Yield the raw row chunks returned by the cursor"""
+        if self._consumed:
+            raise exceptions.RowStreamConsumed()
+        self._consumed = True
+
+        fetch_size = size or self._arraysize
+        while chunk := self._cur.fetchmany(fetch_size):
+            self._row_count += len(chunk)
+            yield chunk
+
+    def collect(self) -> domain_rows.Rows:
+        """Materialize the remainder of the stream"""
+        batches = list(self.batches())
+        if batches:
+            return domain_rows.Rows.concat(batches)
+        else:
+            return domain_rows.Rows(column_names=self._column_names, rows=[])
+
+    @property
+    def column_names(self) -> typing.List[str]:
+        return self._column_names
+
+    def column_indices(self, /, column_names: typing.Iterable[str]) -> typing.List[int]:
+        return [self._column_names.index(col_name) for col_name in column_names]
+
+    @property
+    def is_consumed(self) -> bool:
+        return self._consumed
+
+    def partition_by_hash(
+        self, /, column_names: typing.Sequence[str], n: int
+    ) -> typing.Generator[typing.List[domain_rows.Rows], typing.Any, None]:
+        """Split each batch into n buckets with Rows.partition_by_hash"""
+        for batch in self.batches():
+            yield batch.partition_by_hash(column_names, n)
+
+    @property
+    def row_count(self) -> int:
+        """Number of rows fetched so far"""
+        return self._row_count
+
+    def to_parquet(
+        self,
+        /,
+        path: typing.Union[str, pathlib.Path],
+        *,
+        table: typing.Optional[domain_table.Table] = None,
+    ) -> int:
+        """Write the remainder of the stream to a Parquet file, one row group per batch
+
+        Without a table, the schema is inferred from the first batch.  Returns the
+        number of rows written.
+        """
+        pq = arrow_interop.import_pyarrow_parquet()
+        schema = (
+            None
+            if table is None
+            else arrow_interop.arrow_schema(table, column_names=self._column_names)
+        )
+        writer = None
+        rows_written = 0
+        try:
+            for batch in self.batches():
+                arrow_table = batch.to_arrow(schema)
+                if writer is None:
+                    schema = arrow_table.schema
+                    writer = pq.ParquetWriter(path, schema)
+                writer.write_table(arrow_table)
+                rows_written += batch.row_count
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            domain_rows.Rows(column_names=self._column_names, rows=[]).to_parquet(
+                path, table=table
+            )
+        return rows_written
+
+    def __repr__(self) -> str:
+        return f"<RowStream: {self._row_count} items fetched>"
+
+
+RowSource = typing.Union[domain_rows.Rows, RowStream]
+
+
+def shares_connection(cur: pyodbc.Cursor, other: pyodbc.Cursor, /) -> bool:
+    """Whether two cursors may run on the same connection
+
+    A RowStream keeps its connection busy until it has been consumed, and many
+    drivers (SQL Server without MARS among them) refuse to run a statement on a
+    connection that still has an open result set.  Cursors that do not expose their
+    connection are assumed to share one.
+    """
+    if cur is other:
+        return True
+    connection = getattr(cur, "connection", None)
+    return connection is None or connection is getattr(other, "connection", None)
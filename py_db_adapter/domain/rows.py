@@ -1,38 +1,138 @@
 from __future__ import annotations
 
 import itertools
+import operator
+import pathlib
 import typing
 
-__all__ = ("Row", "Rows", "rows_from_lookup_table", "rows_to_lookup_table")
+from py_db_adapter.domain import exceptions, table as domain_table
+from py_db_adapter.domain.arrow_interop import (
+    arrow_array,
+    arrow_schema,
+    import_pyarrow,
+    import_pyarrow_parquet,
+)
+from py_db_adapter.domain.column_storage import (
+    ChunkedColumn,
+    ConstantColumn,
+    column_nbytes,
+    column_slice,
+    column_take,
+    columns_equal,
+)
+from py_db_adapter.domain.named_row import NamedRow
+from py_db_adapter.domain.ordering import merge_sorted, null_safe_key
+from py_db_adapter.domain.row_hash import (
+    add_hash_sums,
+    hash_buckets,
+    ordered_digest,
+    row_hash_sum,
+    unordered_digest,
+)
+from py_db_adapter.domain.row_index import RowIndex
+
+if typing.TYPE_CHECKING:
+    import pyarrow
+
+__all__ = (
+    "Row",
+    "Rows",
+    "anti_join",
+    "lookup_table_from_tuples",
+    "merge_join",
+    "row_getter",
+    "rows_from_lookup_table",
+    "rows_to_lookup_table",
+)
 
 Row = typing.Tuple[typing.Any, ...]
+ColumnValues = typing.Sequence[typing.Any]
 
 
 class Rows:
+    """Column-oriented result set
+
+    Values are stored as one sequence per column, so projections and column access
+    share the underlying storage instead of rebuilding every row.
+    """
+
     def __init__(
         self,
         *,
         column_names: typing.Iterable[str],
         rows: typing.Iterable[Row],
     ):
-        self._column_names = list(column_names)
-        self._rows = list(rows)
+        column_names = list(column_names)
+        rows = rows if isinstance(rows, list) else list(rows)
+        if rows:
+            width = len(column_names)
+            widths = set(map(len, rows))
+            if widths != {width}:
+                raise exceptions.RowWidthMismatch(
+                    expected_width=width, actual_width=min(widths - {width})
+                )
+            columns: typing.List[ColumnValues] = list(zip(*rows))
+        else:
+            columns = [tuple() for _ in column_names]
+        self._init_storage(
+            column_names=column_names, columns=columns, row_count=len(rows)
+        )
+
+    def _init_storage(
+        self,
+        *,
+        column_names: typing.List[str],
+        columns: typing.List[ColumnValues],
+        row_count: int,
+    ) -> None:
+        self._column_names = column_names
+        self._columns = columns
+        self._row_count = row_count
 
         self._column_indices = {
             col_name: i for i, col_name in enumerate(self._column_names)
         }
+        self._indexes: typing.Dict[typing.Tuple[str, ...], RowIndex] = {}
+        self._estimated_nbytes: typing.Optional[int] = None
+        self._ordered_digest: typing.Optional[str] = None
+        self._row_hash_sum: typing.Optional[int] = None
+
+    @classmethod
+    def from_columns(
+        cls,
+        *,
+        column_names: typing.Iterable[str],
+        columns: typing.Iterable[ColumnValues],
+    ) -> Rows:
+        column_names = list(column_names)
+        columns = list(columns)
+        row_count = len(columns[0]) if columns else 0
+        return cls._from_storage(
+            column_names=column_names, columns=columns, row_count=row_count
+        )
+
+    @classmethod
+    def _from_storage(
+        cls,
+        *,
+        column_names: typing.List[str],
+        columns: typing.List[ColumnValues],
+        row_count: int,
+    ) -> Rows:
+        rows = cls.__new__(cls)
+        rows._init_storage(
+            column_names=column_names, columns=columns, row_count=row_count
+        )
+        return rows
 
     def add_column_from_callable(
         self,
         *,
         column_name: str,
-        fn: typing.Callable[[typing.Dict[str, typing.Any]], typing.Any],
+        fn: typing.Callable[[NamedRow], typing.Any],
     ) -> Rows:
-        return Rows(
-            column_names=self._column_names + [column_name],
-            rows=[
-                tuple(row_dict.values()) + fn(row_dict) for row_dict in self.as_dicts()
-            ],
+        return self.replace_column(
+            column_name, tuple(fn(row) for row in self.as_named_rows())
         )
 
     def add_static_column(
@@ -41,31 +141,42 @@ class Rows:
         column_name: str,
         value: typing.Any,
     ) -> Rows:
-        return Rows(
-            column_names=self._column_names + [column_name],
-            rows=[row + (value,) for row in self._rows],
-        )
+        return self.set_column_value(column_name, value)
 
     def as_dicts(self) -> typing.List[typing.Dict[str, typing.Hashable]]:
-        return [dict(sorted(zip(self._column_names, row))) for row in self._rows]
+        col_names = sorted(self._column_names)
+        return [dict(zip(col_names, row)) for row in self._iter_rows(col_names)]
 
-    def as_tuples(self, *, sort_columns: bool = True) -> typing.List[Row]:
-        if sort_columns:
-            ordered_col_indices = [
-                self._column_indices[col_name]
-                for col_name in sorted(self._column_names)
-            ]
-            return [tuple(row[i] for i in ordered_col_indices) for row in self._rows]
-        return self._rows
+    def as_named_rows(self) -> typing.Iterator[NamedRow]:
+        """Iterate over NamedRow proxies that share this instance's column index"""
+        column_indices = self._column_indices
+        for values in self._iter_rows(self._column_names):
+            yield NamedRow(values, column_indices)
+
+    def as_tuples(
+        self,
+        *,
+        sort_columns: bool = True,
+        column_names: typing.Optional[typing.Sequence[str]] = None,
+    ) -> typing.List[Row]:
+        return list(
+            self.iter_tuples(sort_columns=sort_columns, column_names=column_names)
+        )
 
     def batches(self, /, size: int) -> typing.Generator[Rows, typing.Any, None]:
-        chunks = (self._rows[i : i + size] for i in range(0, len(self._rows), size))
-        for chunk in chunks:
-            yield Rows(column_names=self._column_names, rows=chunk)
+        """Yield consecutive batches that are views over this instance's columns"""
+        for i in range(0, self._row_count, size):
+            yield Rows._from_storage(
+                column_names=self._column_names,
+                columns=[column_slice(col, i, size) for col in self._columns],
+                row_count=min(size, self._row_count - i),
+            )
+
+    def column_indices(self, /, column_names: typing.Iterable[str]) -> typing.List[int]:
+        return [self._column_indices[col_name] for col_name in column_names]
 
     def column(self, /, column_name: str) -> typing.List[typing.Hashable]:
-        col_index = self._column_indices[column_name]
-        return [row[col_index] for row in self._rows]
+        return list(self._column_values(column_name))
 
     @property
     def column_names(self) -> typing.List[str]:
@@ -73,88 +184,403 @@ class Rows:
 
     @staticmethod
     def concat(rows: typing.List[Rows]) -> Rows:
+        """Combine batches that share a schema by chaining their column chunks"""
         if rows:
             column_names = rows[0].column_names
-            all_rows = [row for batch in rows for row in batch.as_tuples()]
-            return Rows(
+            columns: typing.List[ColumnValues] = [
+                ChunkedColumn(batch._column_values(col_name) for batch in rows)
+                for col_name in column_names
+            ]
+            combined = Rows._from_storage(
                 column_names=column_names,
-                rows=all_rows,
+                columns=columns,
+                row_count=sum(batch.row_count for batch in rows),
             )
+            if all(
+                batch._row_hash_sum is not None and batch.column_names == column_names
+                for batch in rows
+            ):
+                combined._row_hash_sum = add_hash_sums(
+                    typing.cast(int, batch._row_hash_sum) for batch in rows
+                )
+            return combined
         else:
             return Rows(column_names=[], rows=[])
 
+    @classmethod
+    def from_arrow(
+        cls, /, data: typing.Union[pyarrow.Table, pyarrow.RecordBatch]
+    ) -> Rows:
+        return Rows.from_columns(
+            column_names=data.schema.names,
+            columns=[col.to_pylist() for col in data.columns],
+        )
+
+    @classmethod
+    def from_parquet(
+        cls,
+        /,
+        path: typing.Union[str, pathlib.Path],
+        *,
+        columns: typing.Optional[typing.Sequence[str]] = None,
+    ) -> Rows:
+        pq = import_pyarrow_parquet()
+        return cls.from_arrow(pq.read_table(path, columns=columns))
+
     @classmethod
     def from_dicts(
         cls, /, rows: typing.List[typing.Dict[str, typing.Hashable]]
     ) -> Rows:
         if rows:
             column_names = sorted(rows[0].keys())
-            new_rows = [tuple(v for _, v in sorted(row.items())) for row in rows]
-            return Rows(column_names=column_names, rows=new_rows)
+            return Rows.from_columns(
+                column_names=column_names,
+                columns=[tuple(row[col] for row in rows) for col in column_names],
+            )
         else:
             return Rows(column_names=[], rows=[])
 
+    def filter(self, /, predicate: typing.Callable[[NamedRow], bool]) -> Rows:
+        return self.take(
+            [ix for ix, row in enumerate(self.as_named_rows()) if predicate(row)]
+        )
+
+    @classmethod
+    def iter_parquet(
+        cls,
+        /,
+        path: typing.Union[str, pathlib.Path],
+        *,
+        batch_size: int = 10_000,
+        columns: typing.Optional[typing.Sequence[str]] = None,
+    ) -> typing.Generator[Rows, typing.Any, None]:
+        """Read a Parquet file one batch at a time, so it never has to fit in memory"""
+        pq = import_pyarrow_parquet()
+        parquet_file = pq.ParquetFile(path)
+        try:
+            for batch in parquet_file.iter_batches(
+                batch_size=batch_size, columns=columns
+            ):
+                yield cls.from_arrow(batch)
+        finally:
+            parquet_file.close()
+
+    def iter_tuples(
+        self,
+        *,
+        sort_columns: bool = True,
+        column_names: typing.Optional[typing.Sequence[str]] = None,
+    ) -> typing.Iterator[Row]:
+        """Lazy counterpart to as_tuples that builds each tuple as it is read"""
+        if column_names is not None:
+            return self._iter_rows(column_names)
+        if sort_columns:
+            return self._iter_rows(sorted(self._column_names))
+        return self._iter_rows(self._column_names)
+
+    def map_column(
+        self,
+        column_name: str,
+        /,
+        fn: typing.Callable[[typing.Any], typing.Any],
+    ) -> Rows:
+        """Apply a function to each value of a single column"""
+        return self.replace_column(
+            column_name, tuple(map(fn, self._column_values(column_name)))
+        )
+
+    @property
+    def estimated_nbytes(self) -> int:
+        """Deep size of the columns, estimated from a sample of each one's values"""
+        if self._estimated_nbytes is None:
+            self._estimated_nbytes = sum(map(column_nbytes, self._columns))
+        return self._estimated_nbytes
+
+    def fingerprint(self, *, ordered: bool = True) -> str:
+        """Digest of the column names and values, computed once and then cached
+
+        With ordered=False the digest only depends on which rows are present, not on
+        their order.  Values that compare equal, such as 1 and 1.0, hash the same.
+        """
+        if ordered:
+            if self._ordered_digest is None:
+                self._ordered_digest = ordered_digest(
+                    self._iter_rows(self._column_names), self._column_names
+                )
+            return self._ordered_digest
+        if self._row_hash_sum is None:
+            self._row_hash_sum = row_hash_sum(self._iter_rows(self._column_names))
+        return unordered_digest(self._row_hash_sum, self._column_names, self._row_count)
+
     def first_value(self) -> typing.Optional[typing.Any]:
-        if self.is_empty:
+        if self.is_empty or not self._columns:
             return None
         else:
-            return self._rows[0][0]
+            return self._columns[0][0]
+
+    def index_by(self, /, column_names: typing.Sequence[str]) -> RowIndex:
+        """Hash index on the given columns, built once and reused across calls"""
+        key = tuple(column_names)
+        if key not in self._indexes:
+            self._indexes[key] = RowIndex(
+                column_names=column_names, keys=self._iter_rows(column_names)
+            )
+        return self._indexes[key]
 
     @property
     def is_empty(self) -> bool:
-        return not self._rows
+        return self._row_count == 0
 
     @property
     def row_count(self) -> int:
-        return len(self._rows)
+        return self._row_count
+
+    def partition_by_hash(
+        self, /, column_names: typing.Sequence[str], n: int
+    ) -> typing.List[Rows]:
+        """Split into n buckets so that a key always lands in the same bucket number"""
+        return [
+            self.take(positions)
+            for positions in hash_buckets(self._iter_rows(column_names), n)
+        ]
+
+    def replace_column(
+        self, column_name: str, /, values: typing.Sequence[typing.Any]
+    ) -> Rows:
+        """Replace a column's storage, or add the column if it does not exist yet
+
+        Arrays that provide a tolist method, like NumPy arrays, are converted to
+        Python values, since database drivers do not accept NumPy scalars.
+        """
+        if hasattr(values, "tolist"):
+            values = getattr(values, "tolist")()
+        if len(values) != self._row_count:
+            raise exceptions.ColumnLengthMismatch(
+                column_name=column_name,
+                expected_length=self._row_count,
+                actual_length=len(values),
+            )
+        if column_name in self._column_indices:
+            columns = list(self._columns)
+            columns[self._column_indices[column_name]] = values
+            return Rows._from_storage(
+                column_names=self._column_names,
+                columns=columns,
+                row_count=self._row_count,
+            )
+        else:
+            return Rows._from_storage(
+                column_names=self._column_names + [column_name],
+                columns=self._columns + [values],
+                row_count=self._row_count,
+            )
+
+    def select_by_keys(
+        self, /, column_names: typing.Sequence[str], keys: typing.Iterable[Row]
+    ) -> Rows:
+        """Rows whose values for column_names match one of the keys"""
+        return self.take(self.index_by(column_names).positions(keys))
+
+    def set_column_value(self, column_name: str, /, value: typing.Any) -> Rows:
+        """Set every value of a column to a scalar, adding the column if needed"""
+        return self.replace_column(column_name, ConstantColumn(value, self._row_count))
+
+    def sort_by(self, /, column_names: typing.Sequence[str]) -> Rows:
+        """Stable sort on the given columns, with NULLs ahead of every other value"""
+        sort_keys = [null_safe_key(key) for key in self._iter_rows(column_names)]
+        result = self.take(sorted(range(self._row_count), key=sort_keys.__getitem__))
+        result._row_hash_sum = self._row_hash_sum
+        return result
 
     def subset(self, column_names: typing.Set[str]) -> Rows:
+        """Projection onto column_names that shares this instance's column storage"""
         cols = sorted(column_names)
-        rows = [
-            tuple(row[self._column_indices[col_name]] for col_name in cols)
-            for row in self._rows
+        if cols == self._column_names:
+            return self
+        return Rows._from_storage(
+            column_names=cols,
+            columns=[self._column_values(col_name) for col_name in cols],
+            row_count=self._row_count,
+        )
+
+    def take(self, /, positions: typing.Sequence[int]) -> Rows:
+        return Rows._from_storage(
+            column_names=self._column_names,
+            columns=[column_take(col, positions) for col in self._columns],
+            row_count=len(positions),
+        )
+
+    def to_arrow(
+        self, /, schema: typing.Optional[pyarrow.Schema] = None
+    ) -> pyarrow.Table:
+        pa = import_pyarrow()
+        if schema is not None:
+            schema = pa.schema(
+                [schema.field(col_name) for col_name in self._column_names]
+            )
+        arrays = [
+            arrow_array(col, None if schema is None else schema.field(i).type)
+            for i, col in enumerate(self._columns)
         ]
-        return Rows(column_names=cols, rows=rows)
+        if schema is None:
+            return pa.Table.from_arrays(arrays, names=self._column_names)
+        else:
+            return pa.Table.from_arrays(arrays, schema=schema)
+
+    def to_parquet(
+        self,
+        /,
+        path: typing.Union[str, pathlib.Path],
+        *,
+        table: typing.Optional[domain_table.Table] = None,
+        row_group_size: typing.Optional[int] = None,
+    ) -> None:
+        """Write a Parquet file, typed from the table's column metadata if provided"""
+        pq = import_pyarrow_parquet()
+        schema = (
+            None
+            if table is None
+            else arrow_schema(table, column_names=self._column_names)
+        )
+        pq.write_table(self.to_arrow(schema), path, row_group_size=row_group_size)
 
     def update_column_values(
         self,
         column_name: str,
-        transform: typing.Callable[[typing.Dict[str, typing.Any]], typing.Any] = None,
+        transform: typing.Optional[typing.Callable[[NamedRow], typing.Any]] = None,
         static_value: typing.Any = None,
     ) -> Rows:
         if transform is None:
-            rows = [
-                {
-                    key: static_value if column_name == key else val
-                    for ix, (key, val) in enumerate(row_dict.items())
-                }
-                for row_dict in self.as_dicts()
-            ]
+            return self.set_column_value(column_name, static_value)
         else:
-            rows = [
-                {
-                    key: transform(row_dict) if column_name == key else val
-                    for ix, (key, val) in enumerate(row_dict.items())
-                }
-                for row_dict in self.as_dicts()
-            ]
-        return Rows.from_dicts(rows)
+            return self.replace_column(
+                column_name, tuple(transform(row) for row in self.as_named_rows())
+            )
+
+    def _column_values(self, /, column_name: str) -> ColumnValues:
+        return self._columns[self._column_indices[column_name]]
+
+    def _iter_rows(self, /, column_names: typing.Iterable[str]) -> typing.Iterator[Row]:
+        columns = [self._column_values(col_name) for col_name in column_names]
+        if columns:
+            return zip(*columns)
+        else:
+            return itertools.repeat(tuple(), self._row_count)
 
     def __eq__(self, other: typing.Any) -> bool:
         if other.__class__ is self.__class__:
             other = typing.cast(Rows, other)
-            return self._rows == other._rows
+            if (
+                self._row_count != other._row_count
+                or self._column_names != other._column_names
+            ):
+                return False
+            # Rows that compare equal always have the same digest, but some that
+            # don't (0.1 and Decimal("0.1")) do too, so a digest can only rule
+            # equality out.
+            if (
+                self._ordered_digest is not None
+                and other._ordered_digest is not None
+                and self._ordered_digest != other._ordered_digest
+            ):
+                return False
+            return all(map(columns_equal, self._columns, other._columns))
         else:
             return NotImplemented
 
     def __hash__(self) -> int:
-        return hash(tuple(row) for row in self._rows)
+        return hash(self.fingerprint())
+
+    def __reduce__(self) -> typing.Tuple[typing.Any, ...]:
+        # cached indexes are left out, and each column picks its own compact form
+        return _rows_from_storage, (self._column_names, self._columns, self._row_count)
 
     def __repr__(self) -> str:
-        return f"<Rows: {len(self._rows)} items>"
+        return f"<Rows: {self._row_count} items>"
 
     def __str__(self) -> str:
-        return str(self._rows)
+        return str(self.as_tuples(sort_columns=False))
+
+
+def anti_join(left: Rows, right: Rows, *, key_columns: typing.Sequence[str]) -> Rows:
+    """Rows from left whose key is not in right, both sorted with Rows.sort_by"""
+    positions: typing.List[int] = []
+    for _, left_positions, right_positions in _merge_positions(
+        left, right, key_columns=key_columns
+    ):
+        if not right_positions:
+            positions.extend(left_positions)
+    return left.take(positions)
+
+
+def lookup_table_from_tuples(
+    rows: typing.Iterable[typing.Sequence[typing.Any]],
+    *,
+    key_indices: typing.Sequence[int],
+    value_indices: typing.Sequence[int],
+) -> typing.Dict[Row, Row]:
+    """Build a lookup table from row-oriented data using precomputed column positions"""
+    get_key = row_getter(key_indices)
+    get_value = row_getter(value_indices)
+    return {get_key(row): get_value(row) for row in rows}
+
+
+def merge_join(left: Rows, right: Rows, *, key_columns: typing.Sequence[str]) -> Rows:
+    """Inner join of two inputs sorted on key_columns with Rows.sort_by
+
+    Columns that appear on both sides are taken from left.
+    """
+    left_positions: typing.List[int] = []
+    right_positions: typing.List[int] = []
+    for _, left_matches, right_matches in _merge_positions(
+        left, right, key_columns=key_columns
+    ):
+        for left_pos, right_pos in itertools.product(left_matches, right_matches):
+            left_positions.append(left_pos)
+            right_positions.append(right_pos)
+    joined = left.take(left_positions)
+    right_matched = right.take(right_positions)
+    extra_columns = [
+        col_name
+        for col_name in right.column_names
+        if col_name not in joined._column_indices
+    ]
+    return Rows._from_storage(
+        column_names=joined.column_names + extra_columns,
+        columns=joined._columns
+        + [right_matched._column_values(col_name) for col_name in extra_columns],
+        row_count=joined.row_count,
+    )
+
+
+def _merge_positions(
+    left: Rows, right: Rows, *, key_columns: typing.Sequence[str]
+) -> typing.Iterator[typing.Tuple[Row, typing.List[int], typing.List[int]]]:
+    return merge_sorted(
+        zip(left._iter_rows(key_columns), itertools.count()),
+        zip(right._iter_rows(key_columns), itertools.count()),
+    )
+
+
+def _rows_from_storage(
+    column_names: typing.List[str], columns: typing.List[ColumnValues], row_count: int
+) -> Rows:
+    return Rows._from_storage(
+        column_names=column_names, columns=columns, row_count=row_count
+    )
+
+
+def row_getter(
+    indices: typing.Sequence[int], /
+) -> typing.Callable[[typing.Sequence[typing.Any]], Row]:
+    """operator.itemgetter that always returns a tuple"""
+    if len(indices) > 1:
+        return operator.itemgetter(*indices)
+    elif indices:
+        ix = indices[0]
+        return lambda row: (row[ix],)
+    else:
+        return lambda row: tuple()
 
 
 def rows_from_lookup_table(
@@ -166,10 +592,14 @@ def rows_from_lookup_table(
     ordered_key_col_names = sorted(key_columns)
     ordered_value_col_names = sorted(value_columns)
     column_names = ordered_key_col_names + ordered_value_col_names
-    new_rows = [
-        tuple(itertools.chain(keys, values)) for keys, values in lookup_table.items()
-    ]
-    return Rows(column_names=column_names, rows=new_rows)
+    if lookup_table:
+        key_cols = list(zip(*lookup_table.keys()))
+        value_cols = list(zip(*lookup_table.values()))
+        return Rows.from_columns(
+            column_names=column_names, columns=key_cols + value_cols
+        )
+    else:
+        return Rows(column_names=column_names, rows=[])
 
 
 def rows_to_lookup_table(
@@ -182,10 +612,7 @@ def rows_to_lookup_table(
         value_cols = sorted(set(value_columns))
     else:
         value_cols = sorted({col for col in rs.column_names if col not in pk_cols})
-    return {
-        tuple(row[col] for col in pk_cols): tuple(row[col] for col in value_cols)
-        for row in rs.as_dicts()
-    }
+    return dict(zip(rs._iter_rows(pk_cols), rs._iter_rows(value_cols)))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import typing
+
+from py_db_adapter.domain import exceptions
+from py_db_adapter.domain.column_storage import ChunkedColumn
+from py_db_adapter.domain.rows import Row, Rows
+
+__all__ = ("RowsBuilder",)
+
+
+class RowsBuilder:
+    """Collect rows for a fixed set of columns, then freeze them into Rows
+
+    Appended tuples are only transposed into columns when a chunk of columns is added
+    or the builder is built, so appending a row costs about as much as a list append.
+    Rows are only checked for their number of values, so each one must hold its
+    values in column_names order.
+    """
+
+    def __init__(self, *, column_names: typing.Iterable[str]):
+        self._column_names = list(column_names)
+        self._chunks: typing.List[typing.List[typing.Sequence[typing.Any]]] = [
+            [] for _ in self._column_names
+        ]
+        self._pending: typing.List[Row] = []
+        self._row_count = 0
+
+    def append(self, /, row: Row) -> None:
+        self._pending.append(row)
+
+    def build(self) -> Rows:
+        """Freeze what has been added so far
+
+        The builder can keep growing afterwards without affecting the Rows returned.
+        """
+        self._seal()
+        return Rows.from_columns(
+            column_names=self._column_names,
+            columns=[
+                chunks[0] if len(chunks) == 1 else ChunkedColumn(chunks)
+                for chunks in self._chunks
+            ],
+        )
+
+    @property
+    def column_names(self) -> typing.List[str]:
+        return self._column_names
+
+    def extend(self, /, rows: typing.Iterable[Row]) -> None:
+        self._pending.extend(rows)
+
+    def extend_columns(
+        self, /, columns: typing.Sequence[typing.Sequence[typing.Any]]
+    ) -> None:
+        """Add a chunk of columns, in column_names order, without copying them"""
+        if len(columns) != len(self._column_names):
+            raise exceptions.RowWidthMismatch(
+                expected_width=len(self._column_names), actual_width=len(columns)
+            )
+        self._seal()
+        length = len(columns[0]) if columns else 0
+        for col_name, values in zip(self._column_names, columns):
+            if len(values) != length:
+                raise exceptions.ColumnLengthMismatch(
+                    column_name=col_name,
+                    expected_length=length,
+                    actual_length=len(values),
+                )
+        for chunks, values in zip(self._chunks, columns):
+            chunks.append(values)
+        self._row_count += length
+
+    @property
+    def row_count(self) -> int:
+        return self._row_count + len(self._pending)
+
+    def _seal(self) -> None:
+        if self._pending:
+            width = len(self._column_names)
+            widths = set(map(len, self._pending))
+            if widths != {width}:
+                raise exceptions.RowWidthMismatch(
+                    expected_width=width, actual_width=min(widths - {width})
+                )
+            for chunks, values in zip(self._chunks, zip(*self._pending)):
+                chunks.append(values)
+            self._row_count += len(self._pending)
+            self._pending = []
+
+    def __repr__(self) -> str:
+        return f"<RowsBuilder: {self.row_count} rows>"
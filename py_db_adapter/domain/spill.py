@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import itertools
+import mmap
+import pickle
+import sys
+import tempfile
+import typing
+import weakref
+
+from py_db_adapter.domain.dictionary_column import DictionaryColumn
+from py_db_adapter.domain.typed_column import TypedColumn
+
+__all__ = ("MemoryBudget", "SpillFile", "SpilledColumn", "estimate_nbytes")
+
+
+class MemoryBudget:
+    """Byte budget shared by the fetches of a single job
+
+    Column chunks are kept in memory until the budget is used up.  After that they are
+    written to a memory-mapped temp file and read back on demand.
+    """
+
+    def __init__(self, /, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._used = 0
+        self._spill_file: typing.Optional[SpillFile] = None
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def spilled(self) -> bool:
+        return self._spill_file is not None
+
+    def store(
+        self,
+        values: typing.Sequence[typing.Any],
+        /,
+        nbytes: typing.Optional[int] = None,
+    ) -> typing.Sequence[typing.Any]:
+        """Keep values in memory if they fit in the budget, otherwise spill them
+
+        nbytes overrides the estimated size, for encoded columns whose values do not
+        each take an object of their own.
+        """
+        if nbytes is None:
+            nbytes = estimate_nbytes(values)
+        if self._spill_file is None and self._used + nbytes <= self._max_bytes:
+            self._used += nbytes
+            return values
+        if self._spill_file is None:
+            self._spill_file = SpillFile()
+        return self._spill_file.spill(values)
+
+    @property
+    def used(self) -> int:
+        return self._used
+
+
+class SpillFile:
+    """Append-only temp file of pickled column chunks, read back through mmap"""
+
+    def __init__(self) -> None:
+        self._fh = tempfile.TemporaryFile()
+        self._size = 0
+        self._mmap: typing.Optional[mmap.mmap] = None
+        self._cache_key: typing.Optional[int] = None
+        self._cache_values: typing.Sequence[typing.Any] = tuple()
+        self._handles: typing.List[typing.Any] = [self._fh]
+        weakref.finalize(self, SpillFile._close, self._handles)
+
+    def load(self, /, offset: int, nbytes: int) -> typing.Sequence[typing.Any]:
+        if self._cache_key == offset:
+            return self._cache_values
+        if self._mmap is None or len(self._mmap) < offset + nbytes:
+            self._fh.flush()
+            if self._mmap is not None:
+                self._mmap.close()
+                self._handles.remove(self._mmap)
+            self._mmap = mmap.mmap(
+                self._fh.fileno(), self._size, access=mmap.ACCESS_READ
+            )
+            self._handles.append(self._mmap)
+        with memoryview(self._mmap)[offset : offset + nbytes] as data:
+            values = pickle.loads(data)
+        self._cache_key = offset
+        self._cache_values = values
+        return values
+
+    def spill(self, /, values: typing.Sequence[typing.Any]) -> SpilledColumn:
+        # encoded columns are pickled as they are, so they stay compact on disk
+        if not isinstance(values, (tuple, DictionaryColumn, TypedColumn)):
+            values = tuple(values)
+        data = pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL)
+        offset = self._size
+        self._fh.seek(offset)
+        self._fh.write(data)
+        self._size += len(data)
+        return SpilledColumn(self, offset=offset, nbytes=len(data), length=len(values))
+
+    @staticmethod
+    def _close(handles: typing.List[typing.Any], /) -> None:
+        for handle in reversed(handles):
+            handle.close()
+
+
+class SpilledColumn(typing.Sequence[typing.Any]):
+    """Column chunk that lives in a SpillFile and is unpickled when it is read"""
+
+    __slots__ = ("_spill_file", "_offset", "_nbytes", "_length")
+
+    def __init__(
+        self, spill_file: SpillFile, /, *, offset: int, nbytes: int, length: int
+    ):
+        self._spill_file = spill_file
+        self._offset = offset
+        self._nbytes = nbytes
+        self._length = length
+
+    def load(self) -> typing.Sequence[typing.Any]:
+        return self._spill_file.load(self._offset, self._nbytes)
+
+    @typing.overload
+    def __getitem__(self, ix: int) -> typing.Any:
+        ...
+
+    @typing.overload
+    def __getitem__(self, ix: slice) -> typing.Sequence[typing.Any]:
+        ...
+
+    def __getitem__(
+        self, ix: typing.Union[int, slice]
+    ) -> typing.Union[typing.Any, typing.Sequence[typing.Any]]:
+        return self.load()[ix]
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        return iter(self.load())
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __reduce__(self) -> typing.Tuple[typing.Any, ...]:
+        # the spill file is private to this process, so the values travel in memory
+        return tuple, (tuple(self.load()),)
+
+    def __repr__(self) -> str:
+        return f"<SpilledColumn: {self._nbytes} bytes on disk, length={self._length}>"
+
+
+def estimate_nbytes(
+    values: typing.Sequence[typing.Any], /, sample_size: int = 100
+) -> int:
+    """Estimate the deep size of a column from a sample of its values"""
+    length = len(values)
+    nbytes = sys.getsizeof(values)
+    if length:
+        sample = list(itertools.islice(values, sample_size))
+        avg_value_size = sum(sys.getsizeof(v) for v in sample) / len(sample)
+        nbytes += int(avg_value_size * length)
+    return nbytes
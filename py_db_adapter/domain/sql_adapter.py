@@ -12,7 +12,10 @@ from py_db_adapter.domain import (
     table as domain_table,
 )
 
-__all__ = ("SqlAdapter",)
+__all__ = ("ROW_HASH_COLUMN_NAME", "SqlAdapter")
+
+
+ROW_HASH_COLUMN_NAME = "row_hash"
 
 
 class SqlAdapter(abc.ABC):
@@ -156,7 +159,7 @@ class SqlAdapter(abc.ABC):
                 key=lambda c: c.column_metadata.column_name,
             )
             row_identifiers: typing.List[typing.Dict[str, typing.Any]] = []
-            for row in rows.as_dicts():
+            for row in rows.as_named_rows():
                 row_identifier: typing.Dict[str, typing.Any] = {}
                 for col_adapter in pk_col_adapters:
                     col_name = col_adapter.column_metadata.column_name
@@ -198,6 +201,19 @@ class SqlAdapter(abc.ABC):
         else:
             return f"{self.wrap(schema_name)}.{self.wrap(table_name)}"
 
+    def key_range(
+        self, *, schema_name: typing.Optional[str], table_name: str, key_column: str
+    ) -> str:
+        wrapped_key_column = self.wrap(key_column)
+        full_table_name = self.full_table_name(
+            schema_name=schema_name, table_name=table_name
+        )
+        return (
+            f"SELECT MIN({wrapped_key_column}) AS {self.wrap('min_key')}, "
+            f"MAX({wrapped_key_column}) AS {self.wrap('max_key')} "
+            f"FROM {full_table_name}"
+        )
+
     @property
     def max_float_literal_decimal_places(self) -> int:
         return self._max_float_literal_decimal_places
@@ -211,12 +227,32 @@ class SqlAdapter(abc.ABC):
             if col.column_name in table.primary_key.columns
         ]
 
+    @abc.abstractmethod
+    def row_checksum_expression(
+        self, /, columns: typing.Sequence[domain_column.Column]
+    ) -> str:
+        """SQL expression that hashes the given columns of a row into a 32-bit int
+
+        Sums of it are used to compare ranges of rows without fetching them.
+        """
+        raise NotImplementedError
+
     def row_count(self, *, schema_name: typing.Optional[str], table_name: str) -> str:
         full_table_name = self.full_table_name(
             schema_name=schema_name, table_name=table_name
         )
         return f"SELECT COUNT(*) AS row_count FROM {full_table_name}"
 
+    @abc.abstractmethod
+    def row_hash_expression(
+        self, /, columns: typing.Sequence[domain_column.Column]
+    ) -> str:
+        """SQL expression that hashes the given columns of a row into one value
+
+        The hash is only comparable between tables that use the same dialect.
+        """
+        raise NotImplementedError
+
     def select_all_rows(
         self,
         *,
@@ -233,18 +269,86 @@ class SqlAdapter(abc.ABC):
         else:
             return f"SELECT * FROM {full_table_name}"
 
+    def select_bucket_checksums(
+        self,
+        *,
+        schema_name: typing.Optional[str],
+        table_name: str,
+        key_column: str,
+        checksum_columns: typing.Sequence[domain_column.Column],
+        key_ranges: typing.Sequence[typing.Tuple[int, int]],
+        offset: int,
+        width: int,
+    ) -> str:
+        bucket = f"FLOOR(({self.wrap(key_column)} - {offset}) / {width})"
+        checksum = self.row_checksum_expression(checksum_columns)
+        full_table_name = self.full_table_name(
+            schema_name=schema_name, table_name=table_name
+        )
+        where_clause = self._key_ranges_predicate(key_column, key_ranges)
+        return (
+            f"SELECT {bucket} AS {self.wrap('bucket')}, "
+            f"COUNT(*) AS {self.wrap('row_count')}, "
+            f"SUM(CAST({checksum} AS BIGINT)) AS {self.wrap('checksum')} "
+            f"FROM {full_table_name} WHERE {where_clause} GROUP BY {bucket}"
+        )
+
     def select_distinct_rows(
         self,
         *,
         schema_name: typing.Optional[str],
         table_name: str,
         columns: typing.Set[str],
+        order_by: typing.Optional[typing.Sequence[str]] = None,
     ) -> str:
         col_names_csv = ",".join(self.wrap(col) for col in columns)
         full_table_name = self.full_table_name(
             schema_name=schema_name, table_name=table_name
         )
-        return f"SELECT DISTINCT {col_names_csv} FROM {full_table_name}"
+        sql = f"SELECT DISTINCT {col_names_csv} FROM {full_table_name}"
+        if order_by:
+            order_by_csv = ",".join(self.wrap(col) for col in order_by)
+            sql += f" ORDER BY {order_by_csv}"
+        return sql
+
+    def select_row_hashes(
+        self,
+        *,
+        schema_name: typing.Optional[str],
+        table_name: str,
+        key_columns: typing.Sequence[str],
+        hash_columns: typing.Sequence[domain_column.Column],
+        order_by: typing.Optional[typing.Sequence[str]] = None,
+    ) -> str:
+        key_col_names_csv = ",".join(self.wrap(col) for col in key_columns)
+        row_hash = self.row_hash_expression(hash_columns)
+        full_table_name = self.full_table_name(
+            schema_name=schema_name, table_name=table_name
+        )
+        sql = (
+            f"SELECT DISTINCT {key_col_names_csv},"
+            f"{row_hash} AS {self.wrap(ROW_HASH_COLUMN_NAME)} FROM {full_table_name}"
+        )
+        if order_by:
+            order_by_csv = ",".join(self.wrap(col) for col in order_by)
+            sql += f" ORDER BY {order_by_csv}"
+        return sql
+
+    def select_rows_in_key_ranges(
+        self,
+        *,
+        schema_name: typing.Optional[str],
+        table_name: str,
+        key_column: str,
+        columns: typing.Set[str],
+        key_ranges: typing.Sequence[typing.Tuple[int, int]],
+    ) -> str:
+        col_names_csv = ",".join(self.wrap(col) for col in sorted(columns))
+        full_table_name = self.full_table_name(
+            schema_name=schema_name, table_name=table_name
+        )
+        where_clause = self._key_ranges_predicate(key_column, key_ranges)
+        return f"SELECT {col_names_csv} FROM {full_table_name} WHERE {where_clause}"
 
     def select_rows_where(
         self, *, table: domain_table.Table, predicate: sql_predicate.SqlPredicate
@@ -307,6 +411,17 @@ class SqlAdapter(abc.ABC):
     def wrap(self, obj_name: str) -> str:
         raise NotImplementedError
 
+    def _key_ranges_predicate(
+        self, key_column: str, key_ranges: typing.Sequence[typing.Tuple[int, int]], /
+    ) -> str:
+        """Predicate matching keys in any of the half-open [start, stop) ranges"""
+        wrapped_key_column = self.wrap(key_column)
+        return " OR ".join(
+            f"({wrapped_key_column} >= {int(start)} "
+            f"AND {wrapped_key_column} < {int(stop)})"
+            for start, stop in key_ranges
+        )
+
     def _map_column_to_adapter(
         self, /, col: domain_column.Column
     ) -> domain_column_adapter.ColumnSqlAdapter[typing.Any]:
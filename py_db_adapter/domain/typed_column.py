@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import array
+import dataclasses
+import datetime
+import pickle
+import sys
+import typing
+
+from py_db_adapter.domain.data_types import DataType
+
+__all__ = ("TypedColumn", "TypedColumnEncoder", "typed_column_kinds")
+
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def _datetime_from_micros(value: int, /) -> datetime.datetime:
+    return _EPOCH + datetime.timedelta(microseconds=value)
+
+
+def _datetime_to_micros(value: datetime.datetime, /) -> int:
+    return (value - _EPOCH) // _ONE_MICROSECOND
+
+
+@dataclasses.dataclass(frozen=True)
+class _Codec:
+    typecode: str
+    py_type: type
+    encode: typing.Optional[typing.Callable[[typing.Any], typing.Any]]
+    decode: typing.Optional[typing.Callable[[typing.Any], typing.Any]]
+
+
+_CODECS: typing.Dict[DataType, _Codec] = {
+    DataType.Bool: _Codec("b", bool, int, bool),
+    DataType.Date: _Codec(
+        "i", datetime.date, datetime.date.toordinal, datetime.date.fromordinal
+    ),
+    DataType.DateTime: _Codec(
+        "q", datetime.datetime, _datetime_to_micros, _datetime_from_micros
+    ),
+    DataType.Float: _Codec("d", float, None, None),
+    DataType.Int: _Codec("q", int, None, None),
+}
+
+
+def typed_column_kinds() -> typing.Set[DataType]:
+    """Data types that can be stored in a TypedColumn"""
+    return set(_CODECS)
+
+
+class TypedColumn(typing.Sequence[typing.Any]):
+    """Column of numbers, booleans, dates or datetimes packed into an array
+
+    Each value takes the size of its array item instead of a boxed Python object.
+    Values are converted back to Python objects as they are read.  NULLs are tracked
+    in a bitmap, which is omitted when the column has none.
+    """
+
+    __slots__ = ("_values", "_kind", "_nulls", "_null_offset")
+
+    def __init__(
+        self,
+        values: typing.Union[array.array[typing.Any], memoryview],
+        /,
+        kind: DataType,
+        nulls: typing.Optional[typing.Union[bytes, bytearray]] = None,
+        null_offset: int = 0,
+    ):
+        self._values = values
+        self._kind = kind
+        self._nulls = nulls
+        self._null_offset = null_offset
+
+    @property
+    def kind(self) -> DataType:
+        return self._kind
+
+    @property
+    def nulls(self) -> typing.Optional[typing.Union[bytes, bytearray]]:
+        return self._nulls
+
+    @property
+    def values(self) -> typing.Union[array.array[typing.Any], memoryview]:
+        return self._values
+
+    def is_null(self, /, ix: int) -> bool:
+        if self._nulls is None:
+            return False
+        bit = self._null_offset + ix
+        return bool(self._nulls[bit >> 3] & (1 << (bit & 7)))
+
+    def take(self, /, positions: typing.Sequence[int]) -> TypedColumn:
+        values = memoryview(self._values)
+        nulls: typing.Optional[bytearray] = None
+        if self._nulls is not None:
+            nulls = _pack_bits(self.is_null(ix) for ix in positions)
+            if not any(nulls):
+                nulls = None
+        return TypedColumn(
+            array.array(values.format, map(values.__getitem__, positions)),
+            self._kind,
+            nulls,
+        )
+
+    def validity(self) -> typing.Optional[bytes]:
+        """Arrow-style bitmap with a bit set for each value that is not NULL
+
+        Returns None if the column has no NULLs.
+        """
+        if self._nulls is None:
+            return None
+        length = len(self)
+        nulls = int.from_bytes(self._nulls, "little") >> self._null_offset
+        return (~nulls & ((1 << length) - 1)).to_bytes((length + 7) // 8, "little")
+
+    def view(self, /, offset: int, length: int) -> TypedColumn:
+        offset = max(min(offset, len(self)), 0)
+        return TypedColumn(
+            memoryview(self._values)[offset : offset + length],
+            self._kind,
+            self._nulls,
+            self._null_offset + offset,
+        )
+
+    @typing.overload
+    def __getitem__(self, ix: int) -> typing.Any:
+        ...
+
+    @typing.overload
+    def __getitem__(self, ix: slice) -> typing.Sequence[typing.Any]:
+        ...
+
+    def __getitem__(
+        self, ix: typing.Union[int, slice]
+    ) -> typing.Union[typing.Any, typing.Sequence[typing.Any]]:
+        if isinstance(ix, slice):
+            start, stop, step = ix.indices(len(self))
+            if step == 1:
+                return self.view(start, stop - start)
+            return [self[i] for i in range(start, stop, step)]
+        if ix < 0:
+            ix += len(self)
+        if not 0 <= ix < len(self):
+            raise IndexError("TypedColumn index out of range")
+        if self.is_null(ix):
+            return None
+        decode = _CODECS[self._kind].decode
+        value = self._values[ix]
+        return value if decode is None else decode(value)
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        decode = _CODECS[self._kind].decode
+        if self._nulls is None:
+            if decode is None:
+                return iter(self._values)
+            return map(decode, self._values)
+        return (
+            None if self.is_null(ix) else value if decode is None else decode(value)
+            for ix, value in enumerate(self._values)
+        )
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __reduce_ex__(
+        self, protocol: typing.SupportsIndex
+    ) -> typing.Tuple[typing.Any, ...]:
+        values = memoryview(self._values)
+        nulls = None
+        if self._nulls is not None:
+            nulls = bytes(_pack_bits(self.is_null(ix) for ix in range(len(self))))
+        # as with DictionaryColumn, the buffer only goes out-of-band if the pickler
+        # was given a buffer_callback
+        if int(protocol) >= 5:
+            return (
+                _typed_column_from_buffer,
+                (pickle.PickleBuffer(values), values.format, self._kind, nulls),
+            )
+        return TypedColumn, (array.array(values.format, values), self._kind, nulls)
+
+    def __repr__(self) -> str:
+        return f"<TypedColumn: kind={self._kind.name}, length={len(self)}>"
+
+
+class TypedColumnEncoder:
+    """Incrementally pack a column into a TypedColumn as chunks of values arrive
+
+    If a value does not have the exact Python type the column's data type calls for,
+    such as a timezone-aware datetime or an int that overflows 64 bits, the encoder
+    gives up and keeps the values as plain objects.
+    """
+
+    def __init__(self, /, kind: DataType):
+        self._kind = kind
+        self._codec = _CODECS[kind]
+        self._values: array.array[typing.Any] = array.array(self._codec.typecode)
+        self._nulls: typing.Optional[bytearray] = None
+        self._fallback: typing.Optional[typing.List[typing.Any]] = None
+        self._fallback_nbytes = 0
+
+    def extend(self, /, values: typing.Sequence[typing.Any]) -> None:
+        if self._fallback is not None:
+            self._fallback.extend(values)
+            self._fallback_nbytes += 8 * len(values) + sum(map(sys.getsizeof, values))
+            return
+
+        py_type = self._codec.py_type
+        if any(type(v) is not py_type for v in values if v is not None) or (
+            self._kind == DataType.DateTime
+            and any(v.tzinfo is not None for v in values if v is not None)
+        ):
+            self._fall_back(values)
+            return
+
+        start = len(self._values)
+        encode = self._codec.encode
+        try:
+            if encode is None:
+                self._values.extend(0 if v is None else v for v in values)
+            else:
+                self._values.extend(0 if v is None else encode(v) for v in values)
+        except OverflowError:
+            del self._values[start:]
+            self._fall_back(values)
+            return
+
+        for ix, value in enumerate(values):
+            if value is None:
+                if self._nulls is None:
+                    self._nulls = bytearray()
+                bit = start + ix
+                if len(self._nulls) <= bit >> 3:
+                    self._nulls.extend(bytes((bit >> 3) + 1 - len(self._nulls)))
+                self._nulls[bit >> 3] |= 1 << (bit & 7)
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated size of the encoded column, as it grows with each chunk"""
+        if self._fallback is not None:
+            return self._fallback_nbytes
+        return memoryview(self._values).nbytes + (
+            0 if self._nulls is None else len(self._nulls)
+        )
+
+    def finish(self) -> typing.Sequence[typing.Any]:
+        if self._fallback is not None:
+            return tuple(self._fallback)
+        if self._nulls is not None:
+            self._nulls.extend(bytes((len(self._values) + 7) // 8 - len(self._nulls)))
+        return TypedColumn(self._values, self._kind, self._nulls)
+
+    def _fall_back(self, /, values: typing.Sequence[typing.Any]) -> None:
+        self._fallback = list(self.finish())
+        self._fallback.extend(values)
+        self._fallback_nbytes = 8 * len(self._fallback) + sum(
+            map(sys.getsizeof, self._fallback)
+        )
+
+
+def _pack_bits(bits: typing.Iterable[bool], /) -> bytearray:
+    packed = bytearray()
+    for ix, bit in enumerate(bits):
+        if ix & 7 == 0:
+            packed.append(0)
+        if bit:
+            packed[-1] |= 1 << (ix & 7)
+    return packed
+
+
+def _typed_column_from_buffer(
+    buffer: typing.Any,
+    fmt: str,
+    kind: DataType,
+    nulls: typing.Optional[bytes],
+    /,
+) -> TypedColumn:
+    values = memoryview(buffer).cast("B").cast(fmt)  # type: ignore[call-overload]
+    return TypedColumn(values, kind, nulls)
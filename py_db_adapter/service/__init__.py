@@ -2,4 +2,5 @@ from py_db_adapter.service.cache import *
 from py_db_adapter.service.change_tracking import *
 from py_db_adapter.service.copy_table import *
 from py_db_adapter.service.compare_rows import *
+from py_db_adapter.service.diff_tables import *
 from py_db_adapter.service.sync import *
@@ -26,6 +26,7 @@ def update_history_table(
     cache_dir: typing.Optional[pathlib.Path] = None,
     pk_cols: typing.Optional[typing.Set[str]] = None,
     include_cols: typing.Optional[typing.Set[str]] = None,
+    memory_budget: typing.Optional[int] = None,
 ) -> domain.ChangeTrackingResult:
     batch_utc_millis_since_epoch = int(
         (datetime.datetime.utcnow() - datetime.datetime(1970, 1, 1)).total_seconds()
@@ -81,19 +82,23 @@ def update_history_table(
             logger.debug(f"Creating {hist_table.table_name}...")
             dest_db_adapter.create_table(cur=dest_cur, table=hist_table)
 
+        budget = None if memory_budget is None else domain.MemoryBudget(memory_budget)
         hist_repo = domain.Repository(db=dest_db_adapter, table=hist_table)
         prior_state = get_prior_state(
             hist_cur=dest_cur,
             hist_db_adapter=dest_db_adapter,
             hist_table=hist_table,
+            memory_budget=budget,
         )
         current_state = get_current_state(
             cur=src_cur,
             db_adapter=src_db_adapter,
             table=src_table,
+            memory_budget=budget,
         )
 
         src_key_cols = set(src_table.primary_key.columns)
+        src_key_col_order = sorted(src_key_cols)
         changes = domain.compare_rows(
             key_cols=src_key_cols,
             compare_cols=compare_cols or src_table.non_pk_column_names,
@@ -127,22 +132,13 @@ def update_history_table(
                 logger.info(f"Added {rows_added} rows to [{hist_table.table_name}].")
 
             if rows_deleted := changes.rows_deleted.row_count:
-                deleted_ids = {
-                    frozenset(
-                        (pk_col, row_dict[pk_col])
-                        for pk_col in src_key_cols
-                    )
-                    for row_dict in changes.rows_deleted.as_dicts()
-                }
                 # fmt: off
                 soft_deletes = (
-                    domain.Rows.from_dicts([
-                        row_dict for row_dict in prior_state.as_dicts()
-                        if frozenset(
-                            (pk_col, row_dict[pk_col])
-                            for pk_col in src_key_cols
-                        ) in deleted_ids
-                    ])
+                    prior_state
+                    .select_by_keys(
+                        src_key_col_order,
+                        changes.rows_deleted.as_tuples(column_names=src_key_col_order),
+                    )
                     .update_column_values(
                         column_name="valid_to",
                         static_value=batch_utc_millis_since_epoch,
@@ -154,17 +150,10 @@ def update_history_table(
                 logger.info(f"Soft deleted {rows_deleted} rows from [{hist_table.table_name}].")
 
             if rows_updated := changes.rows_updated.row_count:
-                updated_ids = {
-                    frozenset((pk_col, row_dict[pk_col]) for pk_col in src_key_cols)
-                    for row_dict in changes.rows_updated.as_dicts()
-                }
-                old_versions = domain.Rows.from_dicts([
-                    row_dict for row_dict in prior_state.as_dicts()
-                    if frozenset(
-                        (pk_col, row_dict[pk_col])
-                        for pk_col in src_key_cols
-                    ) in updated_ids
-                ]).update_column_values(
+                old_versions = prior_state.select_by_keys(
+                    src_key_col_order,
+                    changes.rows_updated.as_tuples(column_names=src_key_col_order),
+                ).update_column_values(
                     column_name="valid_to",
                     static_value=batch_utc_millis_since_epoch - 1,
                 )
@@ -225,8 +214,9 @@ def get_current_state(
     cur: pyodbc.Cursor,
     db_adapter: domain.DbAdapter,
     table: domain.Table,
+    memory_budget: typing.Optional[domain.MemoryBudget] = None,
 ) -> domain.Rows:
-    repo = domain.Repository(db=db_adapter, table=table)
+    repo = domain.Repository(db=db_adapter, table=table, memory_budget=memory_budget)
     return repo.all(cur=cur, columns=table.column_names)
 
 
@@ -235,8 +225,11 @@ def get_prior_state(
     hist_cur: pyodbc.Cursor,
     hist_db_adapter: domain.DbAdapter,
     hist_table: domain.Table,
+    memory_budget: typing.Optional[domain.MemoryBudget] = None,
 ) -> domain.Rows:
-    hist_repo = domain.Repository(db=hist_db_adapter, table=hist_table)
+    hist_repo = domain.Repository(
+        db=hist_db_adapter, table=hist_table, memory_budget=memory_budget
+    )
     return hist_repo.where(
         cur=hist_cur,
         predicate=domain.SqlPredicate(
@@ -1,12 +1,14 @@
 import dataclasses
 import datetime
 import decimal
+import heapq
 import pathlib
 import typing
 
 import pyodbc
 
 from py_db_adapter import adapter, domain
+from py_db_adapter.service.diff_tables import diff_tables
 
 
 __all__ = ("compare_rows",)
@@ -27,6 +29,9 @@ def compare_rows(
     compare_cols: typing.Optional[typing.Set[str]] = None,  # None = compare on all common cols
     cache_dir: typing.Optional[pathlib.Path] = None,
     max_examples: int = 10,
+    diff_strategy: domain.DiffStrategy = domain.DiffStrategy.Lookup,
+    compare_digests: bool = False,  # True = compare 64-bit digests of the compare cols
+    row_hash_pushdown: bool = False,  # True = have the databases hash the compare cols
     # fmt: on
 ) -> domain.RowComparisonResult:
     result = domain.RowComparisonResult(
@@ -103,42 +108,39 @@ def compare_rows(
             dest_cols = dest_table.non_pk_column_names
             compare_cols = src_cols & dest_cols
 
-        src_rows = src_db_adapter.table_keys(
-            cur=src_cur,
-            table=src_table,
-            additional_cols=compare_cols,
-        )
-        dest_rows = dest_db_adapter.table_keys(
-            cur=dest_cur,
-            table=dest_table,
-            additional_cols=compare_cols,
+        table_diff = diff_tables(
+            src_cur=src_cur,
+            dest_cur=dest_cur,
+            src_db_adapter=src_db_adapter,
+            dest_db_adapter=dest_db_adapter,
+            src_table=src_table,
+            dest_table=dest_table,
+            key_cols=pks,
+            compare_cols=compare_cols,
+            strategy=diff_strategy,
+            compare_digests=compare_digests,
+            row_hash_pushdown=row_hash_pushdown,
         )
         result = dataclasses.replace(
             result,
-            src_rows=src_rows.row_count,
-            dest_rows=dest_rows.row_count,
-        )
-
-        diff: domain.RowDiff = domain.compare_rows(
-            src_rows=src_rows,
-            dest_rows=dest_rows,
-            key_cols=pks,
-            compare_cols=compare_cols,
+            src_rows=table_diff.src_rows,
+            dest_rows=table_diff.dest_rows,
         )
+        diff = table_diff.diff
 
         extra_rows = diff.rows_deleted
         missing_rows = diff.rows_added
         stale_rows = diff.rows_updated
 
-        if src_rows.row_count:
+        if table_diff.src_rows:
             extra_pct = decimal.Decimal(
-                format(extra_rows.row_count / src_rows.row_count, ".2f")
+                format(extra_rows.row_count / table_diff.src_rows, ".2f")
             )
             missing_pct = decimal.Decimal(
-                format(missing_rows.row_count / src_rows.row_count, ".2f")
+                format(missing_rows.row_count / table_diff.src_rows, ".2f")
             )
             stale_pct = decimal.Decimal(
-                format(stale_rows.row_count / src_rows.row_count, ".2f")
+                format(stale_rows.row_count / table_diff.src_rows, ".2f")
             )
         else:
             extra_pct = decimal.Decimal("1")
@@ -209,13 +211,12 @@ def rows_to_examples(
     if rows.is_empty:
         return ""
     else:
-        pks: typing.List[typing.Dict[str, typing.Any]] = rows.subset(pk_cols).as_dicts()
-        if pks:
-            prefix = "(" + ", ".join(pks[0].keys()) + "): "
-            examples = [
-                "(" + ", ".join(str(c) for c in row.values()) + ")"
-                for row in sorted(pks, key=lambda d: tuple(d.values()))[:max_examples]
-            ]
-            return prefix + ", ".join(str(x) for x in examples)
-        else:
-            return ""
+        pks = rows.subset(pk_cols)
+        prefix = "(" + ", ".join(pks.column_names) + "): "
+        examples = [
+            "(" + ", ".join(str(c) for c in row) + ")"
+            for row in heapq.nsmallest(
+                max_examples, pks.iter_tuples(), key=domain.null_safe_key
+            )
+        ]
+        return prefix + ", ".join(str(x) for x in examples)
@@ -0,0 +1,326 @@
+import dataclasses
+import typing
+
+import pyodbc
+
+from py_db_adapter import domain
+
+__all__ = ("TableDiff", "diff_tables")
+
+
+logger = domain.root_logger.getChild("diff_tables")
+
+# each mismatched bucket is split into this many buckets at the next level
+_CHECKSUM_FAN_OUT = 16
+# past this many mismatched buckets the tables are too far apart for drilling down to
+# pay off, so a full key scan is used instead
+_MAX_MISMATCHED_BUCKETS = 256
+
+
+@dataclasses.dataclass(frozen=True)
+class TableDiff:
+    diff: domain.RowDiff
+    src_rows: int
+    dest_rows: int
+
+
+def diff_tables(
+    # fmt: off
+    *,
+    src_cur: pyodbc.Cursor,
+    dest_cur: pyodbc.Cursor,
+    src_db_adapter: domain.DbAdapter,
+    dest_db_adapter: domain.DbAdapter,
+    src_table: domain.Table,
+    dest_table: domain.Table,
+    key_cols: typing.Set[str],
+    compare_cols: typing.Set[str],
+    strategy: domain.DiffStrategy = domain.DiffStrategy.Lookup,
+    compare_digests: bool = False,  # True = compare 64-bit digests of the compare cols
+    row_hash_pushdown: bool = False,  # True = have the databases hash the compare cols
+    batch_size: int = 10_000,
+    memory_budget: typing.Optional[domain.MemoryBudget] = None,
+    # fmt: on
+) -> TableDiff:
+    """Compare the keys and compare columns of two tables with the given strategy
+
+    SortMerge needs a cursor for each side, since both key scans are read at the same
+    time.  If the cursors are shared, or the databases return keys in an order Python
+    does not agree with (such as a case-insensitive collation), the tables are
+    compared with Lookup instead.
+
+    Row hashes computed by different dialects cannot be compared, so row_hash_pushdown
+    and BucketedChecksum only apply when both tables are read with the same kind of
+    DbAdapter.  BucketedChecksum also needs a single integer key column, and falls
+    back to Lookup when too many buckets differ.
+    """
+    row_hash = False
+    if row_hash_pushdown and compare_cols:
+        if type(src_db_adapter) is type(dest_db_adapter):
+            row_hash = True
+        else:
+            logger.warning(
+                "The source and destination use different dialects, so the compare "
+                "columns will be fetched instead of their row hashes."
+            )
+
+    if strategy == domain.DiffStrategy.BucketedChecksum:
+        key_column = _integer_key_column(
+            src_table=src_table, dest_table=dest_table, key_cols=key_cols
+        )
+        if type(src_db_adapter) is not type(dest_db_adapter):
+            logger.warning(
+                "The source and destination use different dialects, so the lookup "
+                "strategy will be used instead of bucketed checksums."
+            )
+        elif key_column is None:
+            logger.warning(
+                "Bucketed checksums need a single integer key column, so the lookup "
+                "strategy will be used instead."
+            )
+        else:
+            table_diff = _bucketed_checksum_diff(
+                src_cur=src_cur,
+                dest_cur=dest_cur,
+                src_db_adapter=src_db_adapter,
+                dest_db_adapter=dest_db_adapter,
+                src_table=src_table,
+                dest_table=dest_table,
+                key_column=key_column,
+                compare_cols=compare_cols,
+                compare_digests=compare_digests,
+                batch_size=batch_size,
+            )
+            if table_diff is not None:
+                return table_diff
+    elif strategy == domain.DiffStrategy.SortMerge:
+        if domain.shares_connection(src_cur, dest_cur):
+            logger.warning(
+                "The source and destination share a connection, so the lookup "
+                "strategy will be used instead of sort-merge."
+            )
+        else:
+            try:
+                return _sort_merge_diff(
+                    src_cur=src_cur,
+                    dest_cur=dest_cur,
+                    src_db_adapter=src_db_adapter,
+                    dest_db_adapter=dest_db_adapter,
+                    src_table=src_table,
+                    dest_table=dest_table,
+                    key_cols=key_cols,
+                    compare_cols=compare_cols,
+                    compare_digests=compare_digests,
+                    row_hash=row_hash,
+                    batch_size=batch_size,
+                )
+            except domain.exceptions.RowsNotSorted as e:
+                logger.warning(f"{e}  Falling back to the lookup strategy.")
+
+    src_rows = src_db_adapter.table_keys(
+        cur=src_cur,
+        table=src_table,
+        additional_cols=compare_cols,
+        memory_budget=memory_budget,
+        row_hash=row_hash,
+    )
+    dest_rows = dest_db_adapter.table_keys(
+        cur=dest_cur,
+        table=dest_table,
+        additional_cols=compare_cols,
+        memory_budget=memory_budget,
+        row_hash=row_hash,
+    )
+    compare = (
+        domain.compare_rows_parallel
+        if strategy == domain.DiffStrategy.Parallel
+        else domain.compare_rows
+    )
+    diff = compare(
+        src_rows=src_rows,
+        dest_rows=dest_rows,
+        key_cols=key_cols,
+        compare_cols={domain.ROW_HASH_COLUMN_NAME} if row_hash else compare_cols,
+        compare_digests=compare_digests,
+    )
+    return TableDiff(
+        diff=diff, src_rows=src_rows.row_count, dest_rows=dest_rows.row_count
+    )
+
+
+def _bucketed_checksum_diff(
+    *,
+    src_cur: pyodbc.Cursor,
+    dest_cur: pyodbc.Cursor,
+    src_db_adapter: domain.DbAdapter,
+    dest_db_adapter: domain.DbAdapter,
+    src_table: domain.Table,
+    dest_table: domain.Table,
+    key_column: str,
+    compare_cols: typing.Set[str],
+    compare_digests: bool,
+    batch_size: int,
+) -> typing.Optional[TableDiff]:
+    src_min, src_max = src_db_adapter.key_range(
+        cur=src_cur, table=src_table, key_column=key_column
+    )
+    dest_min, dest_max = dest_db_adapter.key_range(
+        cur=dest_cur, table=dest_table, key_column=key_column
+    )
+    mins = [int(key) for key in (src_min, dest_min) if key is not None]
+    maxes = [int(key) for key in (src_max, dest_max) if key is not None]
+    if mins:
+        offset = min(mins)
+        key_ranges = [(offset, max(maxes) + 1)]
+    else:
+        offset = 0
+        key_ranges = []
+
+    # widths are powers of the fan-out, so every bucket nests inside its parent
+    span = key_ranges[0][1] - offset if key_ranges else 0
+    width = 1
+    while width < span:
+        width *= _CHECKSUM_FAN_OUT
+
+    src_row_ct: typing.Optional[int] = None
+    dest_row_ct: typing.Optional[int] = None
+    checksum_cols = {key_column} | compare_cols
+    # keys are only fetched once the ranges left are no wider than a batch
+    while key_ranges and span > batch_size:
+        width //= _CHECKSUM_FAN_OUT
+        span = width
+        src_buckets = src_db_adapter.bucket_checksums(
+            cur=src_cur,
+            table=src_table,
+            key_column=key_column,
+            checksum_cols=checksum_cols,
+            key_ranges=key_ranges,
+            offset=offset,
+            width=width,
+        )
+        dest_buckets = dest_db_adapter.bucket_checksums(
+            cur=dest_cur,
+            table=dest_table,
+            key_column=key_column,
+            checksum_cols=checksum_cols,
+            key_ranges=key_ranges,
+            offset=offset,
+            width=width,
+        )
+        if src_row_ct is None:
+            src_row_ct = sum(row_ct for row_ct, _ in src_buckets.values())
+        if dest_row_ct is None:
+            dest_row_ct = sum(row_ct for row_ct, _ in dest_buckets.values())
+
+        mismatched = sorted(
+            bucket
+            for bucket in src_buckets.keys() | dest_buckets.keys()
+            if src_buckets.get(bucket) != dest_buckets.get(bucket)
+        )
+        if len(mismatched) > _MAX_MISMATCHED_BUCKETS:
+            logger.info(
+                f"{len(mismatched)} buckets of {width} keys differ, so the lookup "
+                f"strategy will be used instead of bucketed checksums."
+            )
+            return None
+        key_ranges = _merge_key_ranges(
+            (offset + bucket * width, offset + (bucket + 1) * width)
+            for bucket in mismatched
+        )
+
+    cols = {key_column} | compare_cols
+    if key_ranges:
+        src_rows = src_db_adapter.table_keys_in_ranges(
+            cur=src_cur,
+            table=src_table,
+            key_column=key_column,
+            additional_cols=compare_cols,
+            key_ranges=key_ranges,
+        )
+        dest_rows = dest_db_adapter.table_keys_in_ranges(
+            cur=dest_cur,
+            table=dest_table,
+            key_column=key_column,
+            additional_cols=compare_cols,
+            key_ranges=key_ranges,
+        )
+    else:
+        src_rows = dest_rows = domain.Rows(column_names=sorted(cols), rows=[])
+    diff = domain.compare_rows(
+        src_rows=src_rows,
+        dest_rows=dest_rows,
+        key_cols={key_column},
+        compare_cols=compare_cols,
+        compare_digests=compare_digests,
+    )
+    # if the key range fit in a single batch, the rows fetched are the whole tables
+    return TableDiff(
+        diff=diff,
+        src_rows=src_rows.row_count if src_row_ct is None else src_row_ct,
+        dest_rows=dest_rows.row_count if dest_row_ct is None else dest_row_ct,
+    )
+
+
+def _integer_key_column(
+    *, src_table: domain.Table, dest_table: domain.Table, key_cols: typing.Set[str]
+) -> typing.Optional[str]:
+    if len(key_cols) != 1:
+        return None
+    key_column = next(iter(key_cols))
+    for table in (src_table, dest_table):
+        if table.column_by_name(key_column).data_type != domain.DataType.Int:
+            return None
+    return key_column
+
+
+def _merge_key_ranges(
+    key_ranges: typing.Iterable[typing.Tuple[int, int]], /
+) -> typing.List[typing.Tuple[int, int]]:
+    """Join sorted ranges that touch, to keep the range predicates short"""
+    merged: typing.List[typing.Tuple[int, int]] = []
+    for start, stop in key_ranges:
+        if merged and merged[-1][1] == start:
+            merged[-1] = (merged[-1][0], stop)
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+def _sort_merge_diff(
+    *,
+    src_cur: pyodbc.Cursor,
+    dest_cur: pyodbc.Cursor,
+    src_db_adapter: domain.DbAdapter,
+    dest_db_adapter: domain.DbAdapter,
+    src_table: domain.Table,
+    dest_table: domain.Table,
+    key_cols: typing.Set[str],
+    compare_cols: typing.Set[str],
+    compare_digests: bool,
+    row_hash: bool,
+    batch_size: int,
+) -> TableDiff:
+    src_keys = src_db_adapter.stream_table_keys(
+        cur=src_cur,
+        table=src_table,
+        additional_cols=compare_cols,
+        batch_size=batch_size,
+        row_hash=row_hash,
+    )
+    dest_keys = dest_db_adapter.stream_table_keys(
+        cur=dest_cur,
+        table=dest_table,
+        additional_cols=compare_cols,
+        batch_size=batch_size,
+        row_hash=row_hash,
+    )
+    diff = domain.compare_sorted_rows(
+        src_rows=src_keys,
+        dest_rows=dest_keys,
+        key_cols=key_cols,
+        compare_cols={domain.ROW_HASH_COLUMN_NAME} if row_hash else compare_cols,
+        compare_digests=compare_digests,
+    )
+    return TableDiff(
+        diff=diff, src_rows=src_keys.row_count, dest_rows=dest_keys.row_count
+    )
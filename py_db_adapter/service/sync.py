@@ -6,6 +6,7 @@ import pyodbc
 
 from py_db_adapter import adapter, domain
 from py_db_adapter.service.copy_table import copy_table
+from py_db_adapter.service.diff_tables import diff_tables
 
 __all__ = ("sync",)
 
@@ -31,6 +32,11 @@ def sync(
     cache_dir: typing.Optional[pathlib.Path] = None,
     skip_if_row_counts_match: bool = False,
     batch_size: int = 1000,
+    memory_budget: typing.Optional[int] = None,  # bytes to hold in memory before spilling to disk
+    memory_limit: typing.Optional[int] = None,  # fail once the fetched data passes this many bytes
+    diff_strategy: domain.DiffStrategy = domain.DiffStrategy.Lookup,
+    compare_digests: bool = False,  # True = compare 64-bit digests of the compare cols
+    row_hash_pushdown: bool = False,  # True = have the databases hash the compare cols
     # fmt: on
 ) -> domain.SyncResult:
     result = domain.SyncResult(
@@ -47,155 +53,221 @@ def sync(
         traceback=None,
     )
     try:
-        if src_db_adapter.fast_executemany_available:
-            src_cur.fast_executemany = True
-
-        if dest_db_adapter.fast_executemany_available:
-            dest_cur.fast_executemany = True
-
-        if skip_if_row_counts_match:
-            dest_row_ct = dest_db_adapter.row_count(
-                cur=dest_cur,
-                table_name=dest_table_name,
-                schema_name=dest_schema_name,
-            )
-            src_row_ct = src_db_adapter.row_count(
-                cur=src_cur,
-                table_name=src_table_name,
-                schema_name=src_schema_name,
-            )
-            if src_row_ct == dest_row_ct:
-                result = dataclasses.replace(
-                    result, skipped=True, skipped_reason="rows already match"
+        with domain.track_memory(memory_limit) as tracker:
+            if src_db_adapter.fast_executemany_available:
+                src_cur.fast_executemany = True
+
+            if dest_db_adapter.fast_executemany_available:
+                dest_cur.fast_executemany = True
+
+            if skip_if_row_counts_match:
+                dest_row_ct = dest_db_adapter.row_count(
+                    cur=dest_cur,
+                    table_name=dest_table_name,
+                    schema_name=dest_schema_name,
                 )
-        if result.skipped:
-            logger.info(f"Sync was skipped: {result.skipped_reason}")
-        else:
-            src_table = adapter.inspect_table(
-                cur=src_cur,
-                table_name=src_table_name,
-                schema_name=src_schema_name,
-                pk_cols=pk_cols,
-                include_cols=include_cols,
-                cache_dir=cache_dir,
-            )
-            dest_table, created = copy_table(
-                src_cur=src_cur,
-                dest_cur=dest_cur,
-                dest_db_adapter=dest_db_adapter,
-                src_table_name=src_table_name,
-                src_schema_name=src_schema_name,
-                dest_table_name=dest_table_name,
-                dest_schema_name=dest_schema_name,
-                recreate=recreate,
-                include_cols=include_cols,
-                pk_cols=pk_cols,
-            )
-            if created:
-                if dest_schema_name:
-                    dest_full_table_name = f"[{dest_schema_name}].[{dest_table_name}]"
-                else:
-                    dest_full_table_name = f"[{dest_table_name}]"
-                logger.info(f"{dest_full_table_name} did not exist, so it was created.")
-
-            if pk_cols is None:
-                if src_table.primary_key.columns:
-                    pks: typing.Set[str] = set(src_table.primary_key.columns)
-                elif dest_table.primary_key.columns:
-                    pks = set(dest_table.primary_key.columns)
-                else:
-                    raise domain.exceptions.MissingPrimaryKey(
-                        schema_name=src_schema_name, table_name=src_table_name
+                src_row_ct = src_db_adapter.row_count(
+                    cur=src_cur,
+                    table_name=src_table_name,
+                    schema_name=src_schema_name,
+                )
+                if src_row_ct == dest_row_ct:
+                    result = dataclasses.replace(
+                        result, skipped=True, skipped_reason="rows already match"
                     )
+            if result.skipped:
+                logger.info(f"Sync was skipped: {result.skipped_reason}")
             else:
-                pks = set(pk_cols)
-
-            if not include_cols:
-                include_cols = src_table.column_names & dest_table.column_names
-
-            if compare_cols is None:
-                src_cols = src_table.non_pk_column_names
-                dest_cols = dest_table.non_pk_column_names
-                compare_cols = src_cols & dest_cols
-
-            src_repo = domain.Repository(
-                db=src_db_adapter,
-                table=src_table,
-                change_tracking_columns=compare_cols,
-                batch_size=batch_size,
-            )
-            dest_repo = domain.Repository(
-                db=dest_db_adapter,
-                table=dest_table,
-                change_tracking_columns=compare_cols,
-                batch_size=batch_size,
-            )
-
-            dest_rows = dest_repo.keys(cur=dest_cur, additional_cols=compare_cols)
-
-            if dest_rows.is_empty:
-                logger.info(
-                    f"{dest_table_name} is empty so the source rows will be fully loaded."
+                src_table = adapter.inspect_table(
+                    cur=src_cur,
+                    table_name=src_table_name,
+                    schema_name=src_schema_name,
+                    pk_cols=pk_cols,
+                    include_cols=include_cols,
+                    cache_dir=cache_dir,
                 )
-                src_rows = src_repo.all(cur=src_cur, columns=include_cols)
-                dest_repo.add(cur=dest_cur, rows=src_rows)
-                result = dataclasses.replace(result, added=src_rows.row_count)
-            else:
-                src_keys = src_repo.keys(cur=src_cur, additional_cols=compare_cols)
-                changes = domain.compare_rows(
-                    src_rows=src_keys,
-                    dest_rows=dest_rows,
-                    key_cols=pks,
-                    compare_cols=compare_cols,
+                dest_table, created = copy_table(
+                    src_cur=src_cur,
+                    dest_cur=dest_cur,
+                    dest_db_adapter=dest_db_adapter,
+                    src_table_name=src_table_name,
+                    src_schema_name=src_schema_name,
+                    dest_table_name=dest_table_name,
+                    dest_schema_name=dest_schema_name,
+                    recreate=recreate,
+                    include_cols=include_cols,
+                    pk_cols=pk_cols,
+                )
+                if created:
+                    if dest_schema_name:
+                        dest_full_table_name = (
+                            f"[{dest_schema_name}].[{dest_table_name}]"
+                        )
+                    else:
+                        dest_full_table_name = f"[{dest_table_name}]"
+                    logger.info(
+                        f"{dest_full_table_name} did not exist, so it was created."
+                    )
+
+                if pk_cols is None:
+                    if src_table.primary_key.columns:
+                        pks: typing.Set[str] = set(src_table.primary_key.columns)
+                    elif dest_table.primary_key.columns:
+                        pks = set(dest_table.primary_key.columns)
+                    else:
+                        raise domain.exceptions.MissingPrimaryKey(
+                            schema_name=src_schema_name, table_name=src_table_name
+                        )
+                else:
+                    pks = set(pk_cols)
+
+                if not include_cols:
+                    include_cols = src_table.column_names & dest_table.column_names
+
+                if compare_cols is None:
+                    src_cols = src_table.non_pk_column_names
+                    dest_cols = dest_table.non_pk_column_names
+                    compare_cols = src_cols & dest_cols
+
+                budget = (
+                    None
+                    if memory_budget is None
+                    else domain.MemoryBudget(memory_budget)
+                )
+                src_repo = domain.Repository(
+                    db=src_db_adapter,
+                    table=src_table,
+                    change_tracking_columns=compare_cols,
+                    batch_size=batch_size,
+                    memory_budget=budget,
+                )
+                dest_repo = domain.Repository(
+                    db=dest_db_adapter,
+                    table=dest_table,
+                    change_tracking_columns=compare_cols,
+                    batch_size=batch_size,
+                    memory_budget=budget,
                 )
 
+                # diff_tables scans the keys later, so it only needs to know whether the
+                # destination is empty
+                dest_rows: typing.Optional[domain.Rows] = None
                 if (
-                    changes.rows_added.is_empty
-                    and changes.rows_deleted.is_empty
-                    and changes.rows_updated.is_empty
+                    diff_strategy == domain.DiffStrategy.Lookup
+                    and not row_hash_pushdown
                 ):
+                    dest_rows = dest_repo.keys(
+                        cur=dest_cur, additional_cols=compare_cols
+                    )
+                    dest_is_empty = dest_rows.is_empty
+                else:
+                    dest_is_empty = dest_repo.row_count(cur=dest_cur) == 0
+
+                if dest_is_empty:
                     logger.info(
-                        "Source and destination matched already, so there was no need to refresh."
+                        f"{dest_table_name} is empty so the source rows will be fully loaded."
                     )
-                    result = dataclasses.replace(
-                        result,
-                        skipped=True,
-                        skipped_reason="src and dest rows matched already",
+                    src_rows = _full_load_rows(
+                        src_repo=src_repo,
+                        src_cur=src_cur,
+                        dest_cur=dest_cur,
+                        columns=include_cols,
                     )
+                    dest_repo.add(cur=dest_cur, rows=src_rows)
+                    result = dataclasses.replace(result, added=src_rows.row_count)
                 else:
-                    if rows_added := changes.rows_added.row_count:
-                        new_rows = src_repo.fetch_rows_by_primary_key_values(
-                            cur=src_cur,
-                            rows=changes.rows_added,
-                            cols=include_cols,
+                    if dest_rows is None:
+                        changes = diff_tables(
+                            src_cur=src_cur,
+                            dest_cur=dest_cur,
+                            src_db_adapter=src_db_adapter,
+                            dest_db_adapter=dest_db_adapter,
+                            src_table=src_table,
+                            dest_table=dest_table,
+                            key_cols=pks,
+                            compare_cols=compare_cols,
+                            strategy=diff_strategy,
+                            compare_digests=compare_digests,
+                            row_hash_pushdown=row_hash_pushdown,
+                            batch_size=batch_size,
+                            memory_budget=budget,
+                        ).diff
+                    else:
+                        src_keys = src_repo.keys(
+                            cur=src_cur, additional_cols=compare_cols
+                        )
+                        changes = domain.compare_rows(
+                            src_rows=src_keys,
+                            dest_rows=dest_rows,
+                            key_cols=pks,
+                            compare_cols=compare_cols,
+                            compare_digests=compare_digests,
                         )
-                        dest_repo.add(cur=dest_cur, rows=new_rows)
-                        logger.info(f"Added {rows_added} rows to [{src_table_name}].")
-                    if rows_deleted := changes.rows_deleted.row_count:
-                        dest_repo.delete(cur=dest_cur, rows=changes.rows_deleted)
+
+                    if (
+                        changes.rows_added.is_empty
+                        and changes.rows_deleted.is_empty
+                        and changes.rows_updated.is_empty
+                    ):
                         logger.info(
-                            f"Deleted {rows_deleted} rows from [{src_table_name}]."
+                            "Source and destination matched already, so there was no need to refresh."
                         )
-                    if rows_updated := changes.rows_updated.row_count:
-                        updated_rows = src_repo.fetch_rows_by_primary_key_values(
-                            cur=src_cur,
-                            rows=changes.rows_updated,
-                            cols=include_cols,
+                        result = dataclasses.replace(
+                            result,
+                            skipped=True,
+                            skipped_reason="src and dest rows matched already",
                         )
-                        dest_repo.update(
-                            cur=dest_cur, rows=updated_rows, columns=include_cols
+                    else:
+                        if rows_added := changes.rows_added.row_count:
+                            new_rows = src_repo.fetch_rows_by_primary_key_values(
+                                cur=src_cur,
+                                rows=changes.rows_added,
+                                cols=include_cols,
+                            )
+                            dest_repo.add(cur=dest_cur, rows=new_rows)
+                            logger.info(
+                                f"Added {rows_added} rows to [{src_table_name}]."
+                            )
+                        if rows_deleted := changes.rows_deleted.row_count:
+                            dest_repo.delete(cur=dest_cur, rows=changes.rows_deleted)
+                            logger.info(
+                                f"Deleted {rows_deleted} rows from [{src_table_name}]."
+                            )
+                        if rows_updated := changes.rows_updated.row_count:
+                            updated_rows = src_repo.fetch_rows_by_primary_key_values(
+                                cur=src_cur,
+                                rows=changes.rows_updated,
+                                cols=include_cols,
+                            )
+                            dest_repo.update(
+                                cur=dest_cur, rows=updated_rows, columns=include_cols
+                            )
+                            logger.info(
+                                f"Updated {rows_updated} rows on [{src_table_name}]."
+                            )
+                        result = dataclasses.replace(
+                            result,
+                            added=rows_added,
+                            deleted=rows_deleted,
+                            updated=rows_updated,
                         )
-                        logger.info(
-                            f"Updated {rows_updated} rows on [{src_table_name}]."
-                        )
-                    result = dataclasses.replace(
-                        result,
-                        added=rows_added,
-                        deleted=rows_deleted,
-                        updated=rows_updated,
-                    )
+            logger.debug(f"Fetched an estimated {tracker.used} bytes.")
     except Exception as e:
         tb = domain.exceptions.parse_traceback(e)
         result = dataclasses.replace(result, error_message=str(e), traceback=tb)
     finally:
         return result
+
+
+def _full_load_rows(
+    *,
+    src_repo: domain.Repository,
+    src_cur: pyodbc.Cursor,
+    dest_cur: pyodbc.Cursor,
+    columns: typing.Optional[typing.Set[str]],
+) -> domain.RowSource:
+    # a stream keeps the source connection busy until it has been consumed, so it
+    # can only be used when the destination writes over a connection of its own
+    if domain.shares_connection(src_cur, dest_cur):
+        return src_repo.all(cur=src_cur, columns=columns)
+    return src_repo.stream_all(cur=src_cur, columns=columns)
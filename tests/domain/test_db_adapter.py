@@ -0,0 +1,86 @@
+import pytest
+
+from py_db_adapter.domain import exceptions
+from py_db_adapter.domain.column_storage import ChunkedColumn, column_nbytes
+from py_db_adapter.domain.data_types import DataType
+from py_db_adapter.domain.db_adapter import fetch_record_batches, fetch_rows
+from py_db_adapter.domain.memory_tracker import track_memory
+from py_db_adapter.domain.spill import MemoryBudget, SpilledColumn
+from py_db_adapter.domain.typed_column import TypedColumn
+from tests.fakes import FakeCursor
+
+
+def test_fetch_rows_spills_encoded_columns() -> None:
+    rows = [(i, f"name {i % 3}") for i in range(100)]
+    cur = FakeCursor(column_names=["id", "name"], rows=rows)
+    budget = MemoryBudget(0)
+    result = fetch_rows(
+        cur=cur,
+        sql="SELECT id, name FROM t",
+        column_types={"id": DataType.Int, "name": DataType.Text},
+        arraysize=40,
+        memory_budget=budget,
+    )
+    assert result.as_tuples() == rows
+    for col_name in ("id", "name"):
+        column = result._column_values(col_name)
+        assert isinstance(column, ChunkedColumn)
+        assert len(column.chunks) == 3
+        assert all(isinstance(chunk, SpilledColumn) for chunk in column.chunks)
+    ids = result._column_values("id")
+    assert isinstance(ids, ChunkedColumn)
+    first_chunk = ids.chunks[0]
+    assert isinstance(first_chunk, SpilledColumn)
+    assert isinstance(first_chunk.load(), TypedColumn)
+
+
+def test_fetch_rows_reports_encoded_sizes_to_the_memory_tracker() -> None:
+    rows = [(i, f"name {i % 3}") for i in range(1_000)]
+    cur = FakeCursor(column_names=["id", "name"], rows=rows)
+    with track_memory() as tracker:
+        result = fetch_rows(
+            cur=cur,
+            sql="SELECT id, name FROM t",
+            column_types={"id": DataType.Int, "name": DataType.Text},
+            arraysize=100,
+        )
+    held = sum(
+        column_nbytes(result._column_values(col_name)) for col_name in ("id", "name")
+    )
+    assert held / 2 <= tracker.used <= held * 2
+
+
+def test_fetch_rows_stops_once_the_memory_limit_is_exceeded() -> None:
+    rows = [(i, f"name {i}") for i in range(1_000)]
+    cur = FakeCursor(column_names=["id", "name"], rows=rows)
+    with pytest.raises(exceptions.MemoryLimitExceeded):
+        with track_memory(1_000):
+            fetch_rows(cur=cur, sql="SELECT id, name FROM t", arraysize=100)
+    assert len(cur.fetchmany_sizes) < 10
+
+
+def test_fetch_record_batches_yields_one_batch_per_fetch() -> None:
+    pa = pytest.importorskip("pyarrow")
+    rows = [(i, f"name {i}") for i in range(10)]
+    cur = FakeCursor(column_names=["id", "name"], rows=rows)
+    batches = list(
+        fetch_record_batches(cur=cur, sql="SELECT id, name FROM t", arraysize=4)
+    )
+    assert [batch.num_rows for batch in batches] == [4, 4, 2]
+    assert batches[0].schema.names == ["id", "name"]
+    assert batches[0].schema.field("id").type == pa.int64()
+    table = pa.Table.from_batches(batches)
+    assert list(zip(*table.to_pydict().values())) == rows
+
+
+def test_fetch_record_batches_uses_the_schema_given() -> None:
+    pa = pytest.importorskip("pyarrow")
+    cur = FakeCursor(column_names=["id", "name"], rows=[(1, "a"), (2, None)])
+    schema = pa.schema(
+        [("name", pa.large_string()), ("id", pa.int32()), ("extra", pa.bool_())]
+    )
+    (batch,) = fetch_record_batches(
+        cur=cur, sql="SELECT id, name FROM t", schema=schema
+    )
+    assert batch.schema == pa.schema([("id", pa.int32()), ("name", pa.large_string())])
+    assert batch.to_pydict() == {"id": [1, 2], "name": ["a", None]}
@@ -71,6 +71,63 @@ def test_row_count_sql() -> None:
     )
 
 
+def test_select_bucket_checksums_sql() -> None:
+    sql_adapter = pda.PostgreSQLAdapter()
+    sql = sql_adapter.select_bucket_checksums(
+        schema_name="hr",
+        table_name="employee",
+        key_column="employee_id",
+        checksum_columns=[
+            pda.Column(
+                column_name="employee_id", nullable=False, data_type=pda.DataType.Int
+            )
+        ],
+        key_ranges=[(0, 256), (512, 768)],
+        offset=0,
+        width=16,
+    )
+    # fmt: off
+    assert sql == (
+        "SELECT FLOOR((employee_id - 0) / 16) AS bucket, COUNT(*) AS row_count, "
+        "SUM(CAST(('x' || substr(md5(concat_ws(chr(31), COALESCE(CAST(employee_id AS TEXT), '\\N'))), 1, 8))::bit(32)::int AS BIGINT)) AS checksum "
+        "FROM hr.employee WHERE (employee_id >= 0 AND employee_id < 256) OR (employee_id >= 512 AND employee_id < 768) "
+        "GROUP BY FLOOR((employee_id - 0) / 16)"
+    )
+    # fmt: on
+
+
+def test_select_row_hashes_sql() -> None:
+    sql_adapter = pda.PostgreSQLAdapter()
+    sql = sql_adapter.select_row_hashes(
+        schema_name="hr",
+        table_name="employee",
+        key_columns=["employee_id"],
+        hash_columns=[
+            pda.Column(
+                column_name="employee_name",
+                nullable=False,
+                data_type=pda.DataType.Text,
+                max_length=8190,
+            ),
+            pda.Column(
+                column_name="quotes",
+                nullable=True,
+                data_type=pda.DataType.Text,
+                max_length=255,
+            ),
+        ],
+        order_by=["employee_id"],
+    )
+    # fmt: off
+    assert sql == (
+        "SELECT DISTINCT employee_id,"
+        "md5(concat_ws(chr(31), COALESCE(CAST(employee_name AS TEXT), '\\N'), "
+        "COALESCE(CAST(quotes AS TEXT), '\\N'))) AS row_hash FROM hr.employee "
+        "ORDER BY employee_id"
+    )
+    # fmt: on
+
+
 def test_truncate_table_sql() -> None:
     sql_adapter = pda.PostgreSQLAdapter()
     assert (
@@ -1,5 +1,17 @@
+import concurrent.futures
+import os
+import typing
+
+import pytest
+
 import py_db_adapter.domain.rows
 from py_db_adapter.domain import rows
+from py_db_adapter.domain.compare_rows import (
+    compare_rows,
+    compare_rows_parallel,
+    compare_sorted_rows,
+)
+from py_db_adapter.domain.row_diff import RowDiff
 
 
 def test_as_lookup_table() -> None:
@@ -23,3 +35,120 @@ def test_as_lookup_table() -> None:
         ("i",): (8,),
         ("j",): (9,),
     }
+
+
+def test_lookup_table_from_tuples() -> None:
+    items = [("a", 0, True), ("b", 1, False)]
+    assert rows.lookup_table_from_tuples(
+        items, key_indices=[0], value_indices=[2, 1]
+    ) == {("a",): (True, 0), ("b",): (False, 1)}
+
+
+def test_compare_sorted_rows_matches_compare_rows() -> None:
+    src = rows.Rows(
+        column_names=["id", "name"],
+        rows=[(1, "a"), (2, "b"), (3, "c"), (5, "e")],
+    )
+    dest = rows.Rows(
+        column_names=["id", "name"],
+        rows=[(2, "b"), (3, "x"), (4, "d"), (5, "e")],
+    )
+    expected = compare_rows(key_cols={"id"}, src_rows=src, dest_rows=dest)
+    actual = compare_sorted_rows(key_cols={"id"}, src_rows=src, dest_rows=dest)
+    assert actual.rows_added.as_tuples() == [(1, "a")]
+    assert actual.rows_deleted.as_tuples() == [(4,)]
+    assert actual.rows_updated.as_tuples() == [(3, "c")]
+    assert actual == expected
+
+
+def test_compare_rows_with_digests_returns_keys_only() -> None:
+    src = rows.Rows(column_names=["id", "name"], rows=[(1, "a"), (2, "b"), (3, "c")])
+    dest = rows.Rows(column_names=["id", "name"], rows=[(2, "b"), (3, "x"), (4, "d")])
+    diff = compare_rows(
+        key_cols={"id"}, src_rows=src, dest_rows=dest, compare_digests=True
+    )
+    assert diff.rows_added.as_tuples() == [(1,)]
+    assert diff.rows_deleted.as_tuples() == [(4,)]
+    assert diff.rows_updated.as_tuples() == [(3,)]
+
+
+class CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+    def __init__(self) -> None:
+        super().__init__(max_workers=2)
+        self.submitted = 0
+
+    def submit(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+def dummy_diff_inputs() -> typing.Tuple[rows.Rows, rows.Rows]:
+    src = rows.Rows(column_names=["id", "name"], rows=[(i, str(i)) for i in range(100)])
+    dest = rows.Rows(
+        column_names=["id", "name"],
+        rows=[(i, "x" if i % 10 == 0 else str(i)) for i in range(5, 105)],
+    )
+    return src, dest
+
+
+def assert_same_diff(actual: RowDiff, expected: RowDiff) -> None:
+    assert sorted(actual.rows_added.as_tuples()) == expected.rows_added.as_tuples()
+    assert sorted(actual.rows_deleted.as_tuples()) == expected.rows_deleted.as_tuples()
+    assert sorted(actual.rows_updated.as_tuples()) == expected.rows_updated.as_tuples()
+
+
+def test_compare_rows_parallel_matches_compare_rows(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    src, dest = dummy_diff_inputs()
+    expected = compare_rows(key_cols={"id"}, src_rows=src, dest_rows=dest)
+    actual = compare_rows_parallel(
+        key_cols={"id"}, src_rows=src, dest_rows=dest, max_workers=3, min_rows=0
+    )
+    assert_same_diff(actual, expected)
+
+
+def test_compare_rows_parallel_reuses_the_executor_given(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    src, dest = dummy_diff_inputs()
+    expected = compare_rows(key_cols={"id"}, src_rows=src, dest_rows=dest)
+    with CountingExecutor() as executor:
+        for _ in range(2):
+            actual = compare_rows_parallel(
+                key_cols={"id"},
+                src_rows=src,
+                dest_rows=dest,
+                max_workers=3,
+                executor=executor,
+                min_rows=0,
+            )
+            assert_same_diff(actual, expected)
+        assert executor.submitted == 6
+
+
+def test_compare_rows_parallel_runs_serially_when_it_would_not_pay_off(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    src, dest = dummy_diff_inputs()
+    expected = compare_rows(key_cols={"id"}, src_rows=src, dest_rows=dest)
+    with CountingExecutor() as executor:
+        monkeypatch.setattr(os, "cpu_count", lambda: 4)
+        actual = compare_rows_parallel(
+            key_cols={"id"}, src_rows=src, dest_rows=dest, executor=executor
+        )
+        assert_same_diff(actual, expected)
+
+        monkeypatch.setattr(os, "cpu_count", lambda: 1)
+        actual = compare_rows_parallel(
+            key_cols={"id"},
+            src_rows=src,
+            dest_rows=dest,
+            max_workers=3,
+            executor=executor,
+            min_rows=0,
+        )
+        assert_same_diff(actual, expected)
+        assert executor.submitted == 0
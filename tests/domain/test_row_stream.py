@@ -0,0 +1,85 @@
+import pathlib
+
+import pytest
+
+from py_db_adapter.domain import exceptions
+from py_db_adapter.domain.row_stream import RowStream
+from py_db_adapter.domain.rows import Rows
+from tests.fakes import FakeCursor
+
+
+def dummy_cursor(row_count: int = 10) -> FakeCursor:
+    return FakeCursor(
+        column_names=["id", "name"], rows=[(i, str(i)) for i in range(row_count)]
+    )
+
+
+def dummy_stream(row_count: int = 10) -> RowStream:
+    return RowStream(cur=dummy_cursor(row_count), arraysize=4)
+
+
+def test_batches_fetch_arraysize_rows_at_a_time() -> None:
+    cur = dummy_cursor()
+    stream = RowStream(cur=cur, arraysize=4)
+    batches = list(stream.batches())
+    assert [batch.row_count for batch in batches] == [4, 4, 2]
+    assert cur.fetchmany_sizes == [4, 4, 4, 4]
+    assert Rows.concat(batches).as_tuples(sort_columns=False) == [
+        (i, str(i)) for i in range(10)
+    ]
+    assert stream.row_count == 10
+
+
+def test_chunks_use_the_size_given() -> None:
+    cur = dummy_cursor()
+    stream = RowStream(cur=cur, arraysize=4)
+    assert [len(chunk) for chunk in stream.chunks(3)] == [3, 3, 3, 1]
+    assert cur.fetchmany_sizes == [3, 3, 3, 3, 3]
+
+
+def test_a_stream_can_only_be_read_once() -> None:
+    stream = dummy_stream()
+    assert not stream.is_consumed
+    assert stream.collect().row_count == 10
+    assert stream.is_consumed
+    with pytest.raises(exceptions.RowStreamConsumed):
+        list(stream.batches())
+
+
+def test_collect_an_empty_stream() -> None:
+    collected = dummy_stream(row_count=0).collect()
+    assert collected.column_names == ["id", "name"]
+    assert collected.row_count == 0
+
+
+def test_partition_by_hash_partitions_each_batch() -> None:
+    stream = dummy_stream()
+    partitioned = list(stream.partition_by_hash(["id"], 3))
+    assert len(partitioned) == 3
+    assert all(len(partitions) == 3 for partitions in partitioned)
+    expected = Rows(
+        column_names=["id", "name"], rows=[(i, str(i)) for i in range(10)]
+    ).partition_by_hash(["id"], 3)
+    for bucket in range(3):
+        assert sorted(
+            row
+            for partitions in partitioned
+            for row in partitions[bucket].as_tuples(sort_columns=False)
+        ) == sorted(expected[bucket].as_tuples(sort_columns=False))
+
+
+def test_to_parquet_writes_one_row_group_per_batch(tmp_path: pathlib.Path) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "stream.parquet"
+    assert dummy_stream().to_parquet(path) == 10
+    assert pq.ParquetFile(path).num_row_groups == 3
+    assert Rows.from_parquet(path).as_tuples(sort_columns=False) == [
+        (i, str(i)) for i in range(10)
+    ]
+
+
+def test_to_parquet_writes_an_empty_stream(tmp_path: pathlib.Path) -> None:
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "empty.parquet"
+    assert dummy_stream(row_count=0).to_parquet(path) == 0
+    assert Rows.from_parquet(path).row_count == 0
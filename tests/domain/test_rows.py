@@ -1,4 +1,24 @@
+import array
+import datetime
+import decimal
+import pathlib
+import pickle
+import typing
+
+import pytest
+
+from py_db_adapter.domain import exceptions
+from py_db_adapter.domain.column_storage import ChunkedColumn
+from py_db_adapter.domain.data_types import DataType
+from py_db_adapter.domain.dictionary_column import (
+    DictionaryColumn,
+    DictionaryEncoder,
+    dictionary_encode,
+)
+from py_db_adapter.domain.row_hash import stable_hash
 from py_db_adapter.domain.rows import *
+from py_db_adapter.domain.rows_builder import RowsBuilder
+from py_db_adapter.domain.typed_column import TypedColumn, TypedColumnEncoder
 
 
 def test_as_dicts() -> None:
@@ -45,3 +65,374 @@ def test_update_with_static_value() -> None:
     )
     updated_rows = dummy_rows.update_column_values(column_name="age", static_value=99)
     assert updated_rows.as_tuples() == [(99, "Mark"), (99, "Mandie"), (99, "Steve")]
+
+
+def test_batches_are_views_over_parent_columns() -> None:
+    dummy_rows = Rows(
+        column_names=["name", "age"],
+        rows=list(zip("abcdefg", range(7))),
+    )
+    batches = list(dummy_rows.batches(3))
+    assert [batch.row_count for batch in batches] == [3, 3, 1]
+    assert batches[1].as_tuples(sort_columns=False) == [("d", 3), ("e", 4), ("f", 5)]
+    assert Rows.concat(batches) == dummy_rows
+
+
+def test_named_rows_share_column_index() -> None:
+    dummy_rows = Rows(
+        column_names=["name", "age"],
+        rows=[("Mark", 99), ("Mandie", 52)],
+    )
+    named_rows = list(dummy_rows.as_named_rows())
+    assert named_rows[1]["name"] == "Mandie"
+    assert dict(named_rows[0]) == {"name": "Mark", "age": 99}
+    assert dummy_rows.filter(lambda row: row["age"] > 60).as_tuples() == [(99, "Mark")]
+
+
+def test_arrow_round_trip() -> None:
+    pytest.importorskip("pyarrow")
+    dummy_rows = Rows(
+        column_names=["name", "age"],
+        rows=[("Mark", 99), ("Mandie", None)],
+    )
+    arrow_table = dummy_rows.to_arrow()
+    assert arrow_table.num_rows == 2
+    assert Rows.from_arrow(arrow_table) == dummy_rows
+
+
+def test_to_arrow_builds_encoded_columns_from_their_buffers(
+    tmp_path: pathlib.Path,
+) -> None:
+    pa = pytest.importorskip("pyarrow")
+    columns: typing.Dict[str, typing.List[typing.Any]] = {
+        "active": [True, None, False],
+        "born": [datetime.date(1921, 1, 2), datetime.date(2021, 3, 4), None],
+        "score": [0.5, None, 2.0],
+        "seen": [None, datetime.datetime(2020, 1, 2, 3, 4, 5, 6), None],
+        "visits": [1, 2, None],
+    }
+    kinds = {
+        "active": DataType.Bool,
+        "born": DataType.Date,
+        "score": DataType.Float,
+        "seen": DataType.DateTime,
+        "visits": DataType.Int,
+    }
+    encoded: typing.Dict[str, typing.Sequence[typing.Any]] = {}
+    for col_name, values in columns.items():
+        encoder = TypedColumnEncoder(kinds[col_name])
+        encoder.extend(values)
+        encoded[col_name] = encoder.finish()
+        assert isinstance(encoded[col_name], TypedColumn)
+    statuses = ["open", None, "open"]
+    encoded["status"] = DictionaryColumn(array.array("I", [0, 1, 0]), ["open", None])
+    dummy_rows = Rows.from_columns(
+        column_names=list(encoded), columns=list(encoded.values())
+    )
+
+    arrow_table = dummy_rows.to_arrow()
+    assert arrow_table.schema.field("status").type == pa.dictionary(
+        pa.uint32(), pa.string()
+    )
+    assert arrow_table.schema.field("born").type == pa.date32()
+    assert arrow_table.to_pydict() == {**columns, "status": statuses}
+
+    view = dummy_rows.batches(2)
+    assert [batch.to_arrow().to_pydict()["visits"] for batch in view] == [
+        [1, 2],
+        [None],
+    ]
+
+    mixed = Rows.from_columns(
+        column_names=["status"],
+        columns=[ChunkedColumn([encoded["status"], ("closed",)])],
+    )
+    assert mixed.to_arrow().to_pydict() == {"status": statuses + ["closed"]}
+    as_strings = mixed.to_arrow(pa.schema([("status", pa.string())]))
+    assert as_strings.schema.field("status").type == pa.string()
+    assert as_strings.to_pydict() == {"status": statuses + ["closed"]}
+
+    path = tmp_path / "encoded.parquet"
+    dummy_rows.to_parquet(path)
+    assert Rows.from_parquet(path) == dummy_rows
+
+
+def test_column_transforms_only_replace_the_affected_column() -> None:
+    dummy_rows = Rows(
+        column_names=["name", "age"],
+        rows=[("Mark", 99), ("Mandie", 52)],
+    )
+    aged = dummy_rows.map_column("age", lambda age: age + 1)
+    assert aged.column("age") == [100, 53]
+    assert aged.column("name") == dummy_rows.column("name")
+    assert dummy_rows.set_column_value("age", 0).column("age") == [0, 0]
+    assert dummy_rows.replace_column("id", [1, 2]).column_names == ["name", "age", "id"]
+
+
+def test_concat_chains_chunks() -> None:
+    items = list(zip("abcdefghij", range(10)))
+    dummy_rows = Rows(column_names=["name", "age"], rows=items)
+    combined = Rows.concat(list(dummy_rows.batches(3)) + [dummy_rows])
+    assert combined.row_count == 20
+    assert combined.as_tuples(sort_columns=False) == items + items
+    assert [batch.row_count for batch in combined.batches(8)] == [8, 8, 4]
+
+
+def test_dictionary_encoded_column() -> None:
+    statuses = ["open", "closed", "open", "open", None, "closed"]
+    encoded = dictionary_encode(statuses)
+    assert isinstance(encoded, DictionaryColumn)
+    assert list(encoded) == statuses
+    assert list(encoded.codes) == [0, 1, 0, 0, 2, 1]
+    assert not isinstance(dictionary_encode(["a", "b", "c"]), DictionaryColumn)
+
+
+def test_dictionary_encoder_gives_up_on_high_cardinality_after_the_sample() -> None:
+    encoder = DictionaryEncoder(sample_size=100)
+    encoder.extend(f"email {i}" for i in range(100))
+    assert encoder._lookup == {}
+    assert len(encoder._codes) == 0
+    encoder.extend(f"email {i}" for i in range(100, 250))
+    assert encoder._lookup == {}
+    assert encoder.finish() == tuple(f"email {i}" for i in range(250))
+
+    low_cardinality = DictionaryEncoder(sample_size=100)
+    low_cardinality.extend(["open", "closed"] * 100)
+    assert isinstance(low_cardinality.finish(), DictionaryColumn)
+
+
+def test_take_keeps_encoded_columns() -> None:
+    statuses = dictionary_encode(["open", "closed", "open", "open", None, "closed"])
+    encoder = TypedColumnEncoder(DataType.Int)
+    encoder.extend([1, None, 3, 4, 5, 6])
+    ids = encoder.finish()
+    assert isinstance(statuses, DictionaryColumn)
+    assert isinstance(ids, TypedColumn)
+    dummy_rows = Rows.from_columns(
+        column_names=["status", "id"], columns=[statuses, ids]
+    )
+
+    taken = dummy_rows.take([5, 0, 2])
+    assert taken.as_tuples(sort_columns=False) == [
+        ("closed", 6),
+        ("open", 1),
+        ("open", 3),
+    ]
+    status_column = taken._column_values("status")
+    assert isinstance(status_column, DictionaryColumn)
+    assert status_column.dictionary is statuses.dictionary
+    id_column = taken._column_values("id")
+    assert isinstance(id_column, TypedColumn)
+    assert id_column.nulls is None
+    assert list(dummy_rows.take([1, 3]).column("id")) == [None, 4]
+
+    chunked = Rows.from_columns(
+        column_names=["id"], columns=[ChunkedColumn([ids, ids.view(0, 3)])]
+    )
+    in_order = chunked.take([4, 5, 6, 8])
+    assert list(in_order.column("id")) == [5, 6, 1, 3]
+    in_order_ids = in_order._column_values("id")
+    assert isinstance(in_order_ids, ChunkedColumn)
+    assert all(isinstance(chunk, TypedColumn) for chunk in in_order_ids.chunks)
+    assert chunked.take([6, 0, 7])._column_values("id") == (1, 1, None)
+
+
+def test_select_by_keys_uses_cached_index() -> None:
+    dummy_rows = Rows(
+        column_names=["id", "name"],
+        rows=[(1, "a"), (2, "b"), (1, "c"), (3, "d")],
+    )
+    index = dummy_rows.index_by(["id"])
+    assert dummy_rows.index_by(["id"]) is index
+    assert index.get((1,)) == [0, 2]
+    assert (4,) not in index
+    selected = dummy_rows.select_by_keys(["id"], [(3,), (1,), (4,)])
+    assert selected.as_tuples(sort_columns=False) == [(1, "a"), (1, "c"), (3, "d")]
+
+
+def test_sort_by_and_merge_joins() -> None:
+    left = Rows(
+        column_names=["id", "name"],
+        rows=[(3, "c"), (None, "x"), (1, "a"), (2, "b"), (1, "d")],
+    ).sort_by(["id"])
+    assert left.column("id") == [None, 1, 1, 2, 3]
+    assert left.column("name") == ["x", "a", "d", "b", "c"]
+    right = Rows(column_names=["id", "age"], rows=[(1, 10), (3, 30), (4, 40)])
+    joined = merge_join(left, right, key_columns=["id"])
+    assert joined.column_names == ["id", "name", "age"]
+    assert joined.column("name") == ["a", "d", "c"]
+    assert joined.column("age") == [10, 10, 30]
+    missing = anti_join(left, right, key_columns=["id"])
+    assert missing.as_tuples(sort_columns=False) == [(None, "x"), (2, "b")]
+    with pytest.raises(exceptions.RowsNotSorted):
+        anti_join(right.sort_by(["age"]).take([2, 0, 1]), left, key_columns=["id"])
+
+
+def test_partition_by_hash_is_stable() -> None:
+    assert stable_hash((1, "a")) == stable_hash((1.0, "a"))
+    assert stable_hash((1, "a")) == stable_hash((decimal.Decimal("1.00"), "a"))
+    assert stable_hash((1, "a")) != stable_hash(("1", "a"))
+
+    items = list(zip(range(100), "abcdefghij" * 10))
+    dummy_rows = Rows(column_names=["id", "name"], rows=items)
+    partitions = dummy_rows.partition_by_hash(["id"], 4)
+    assert len(partitions) == 4
+    assert sum(p.row_count for p in partitions) == 100
+    for bucket, partition in enumerate(partitions):
+        assert all(stable_hash((key,)) % 4 == bucket for key in partition.column("id"))
+
+
+def test_stable_hash_agrees_for_equal_zeros_and_instants() -> None:
+    assert stable_hash((0,)) == stable_hash((decimal.Decimal("-0"),))
+    assert stable_hash((0,)) == stable_hash((decimal.Decimal("-0.00"),))
+    assert stable_hash((0,)) == stable_hash((-0.0,))
+
+    utc = datetime.datetime(2021, 1, 1, 12, tzinfo=datetime.timezone.utc)
+    cet = utc.astimezone(datetime.timezone(datetime.timedelta(hours=1)))
+    assert utc == cet
+    assert stable_hash((utc,)) == stable_hash((cet,))
+    assert stable_hash((utc,)) != stable_hash((utc.replace(tzinfo=None),))
+
+    src = Rows(column_names=["id", "ts"], rows=[(decimal.Decimal("-0"), cet)])
+    dest = Rows(column_names=["id", "ts"], rows=[(0, utc)])
+    assert src == dest
+    assert src.fingerprint() == dest.fingerprint()
+    assert hash(src) == hash(dest)
+
+
+def test_estimated_nbytes_is_cached() -> None:
+    items = list(zip(range(1_000), ["x" * 50] * 1_000))
+    dummy_rows = Rows(column_names=["id", "name"], rows=items)
+    nbytes = dummy_rows.estimated_nbytes
+    assert nbytes > 50 * 1_000
+    assert dummy_rows.estimated_nbytes == nbytes
+    assert dummy_rows.set_column_value("name", "x").estimated_nbytes < nbytes
+
+
+def test_pickle_sends_dictionary_codes_out_of_band() -> None:
+    statuses = dictionary_encode(["open", "closed", "open", "open"] * 25)
+    dummy_rows = Rows.from_columns(
+        column_names=["id", "status"], columns=[range(100), statuses]
+    )
+    buffers: list = []
+    data = pickle.dumps(dummy_rows, protocol=5, buffer_callback=buffers.append)
+    assert len(buffers) == 1
+    assert pickle.loads(data, buffers=buffers) == dummy_rows
+    assert pickle.loads(pickle.dumps(dummy_rows, protocol=4)) == dummy_rows
+
+
+def test_subset_shares_column_storage() -> None:
+    dummy_rows = Rows(
+        column_names=["id", "name", "age"],
+        rows=[(1, "Mark", 99), (2, "Mandie", 52)],
+    )
+    keys = dummy_rows.subset({"id", "age"})
+    assert keys.column_names == ["age", "id"]
+    assert keys.column("id") == [1, 2]
+    assert keys.subset({"age", "id"}) is keys
+    assert list(keys.iter_tuples()) == [(99, 1), (52, 2)]
+
+
+def test_rows_builder_mixes_tuples_and_column_chunks() -> None:
+    builder = RowsBuilder(column_names=["name", "age"])
+    builder.append(("Mark", 99))
+    builder.extend([("Mandie", 52), ("Steve", 74)])
+    builder.extend_columns([("Bob", "Alice"), (1, 2)])
+    builder.append(("Eve", 3))
+    assert builder.row_count == 6
+    built = builder.build()
+    assert built.column("age") == [99, 52, 74, 1, 2, 3]
+    builder.append(("Mallory", 4))
+    assert built.row_count == 6
+    assert builder.build().row_count == 7
+    with pytest.raises(exceptions.ColumnLengthMismatch):
+        builder.extend_columns([("a", "b"), (1,)])
+
+
+def test_rows_builder_rejects_the_wrong_number_of_columns() -> None:
+    builder = RowsBuilder(column_names=["name", "age"])
+    with pytest.raises(exceptions.RowWidthMismatch):
+        builder.extend_columns([("Mark",)])
+    builder.append(("Mark",))
+    with pytest.raises(exceptions.RowWidthMismatch):
+        builder.build()
+    assert builder.row_count == 1
+
+
+def test_rows_reject_ragged_rows() -> None:
+    with pytest.raises(exceptions.RowWidthMismatch):
+        Rows(column_names=["name", "age"], rows=[("Mark", 99), ("Mandie",)])
+    with pytest.raises(exceptions.RowWidthMismatch):
+        Rows(column_names=["name", "age"], rows=[("Mark", 99, "extra")])
+
+
+def test_typed_column_round_trips_values_and_nulls() -> None:
+    values = [datetime.date(2021, 1, day) if day % 3 else None for day in range(1, 21)]
+    encoder = TypedColumnEncoder(DataType.Date)
+    encoder.extend(values[:7])
+    encoder.extend(values[7:])
+    column = encoder.finish()
+    assert isinstance(column, TypedColumn)
+    assert list(column) == values
+    assert list(column[5:12]) == values[5:12]
+    assert column[-3] is None
+
+    assert column[-20] == values[0]
+    with pytest.raises(IndexError):
+        column[-21]
+    with pytest.raises(IndexError):
+        column[20]
+    with pytest.raises(IndexError):
+        column[5:12][-8]
+
+    fallback = TypedColumnEncoder(DataType.Int)
+    fallback.extend([1, None])
+    fallback.extend([2**64])
+    assert fallback.finish() == (1, None, 2**64)
+
+
+def test_fingerprint() -> None:
+    items = list(zip("abcdefghij", range(10)))
+    dummy_rows = Rows(column_names=["name", "age"], rows=items)
+    reversed_rows = Rows(column_names=["name", "age"], rows=items[::-1])
+    assert dummy_rows.fingerprint() != reversed_rows.fingerprint()
+    assert dummy_rows.fingerprint(ordered=False) == reversed_rows.fingerprint(
+        ordered=False
+    )
+    renamed = Rows(column_names=["name", "years"], rows=items)
+    assert dummy_rows.fingerprint() != renamed.fingerprint()
+    assert dummy_rows != renamed
+    assert hash(dummy_rows) == hash(Rows(column_names=["name", "age"], rows=items))
+
+    batches = list(dummy_rows.batches(4))
+    for batch in batches:
+        batch.fingerprint(ordered=False)
+    combined = Rows.concat(batches)
+    assert combined.fingerprint(ordered=False) == dummy_rows.fingerprint(ordered=False)
+    assert combined == dummy_rows
+
+
+def test_equality_does_not_depend_on_cached_fingerprints() -> None:
+    floats = Rows(column_names=["x"], rows=[(0.1,)])
+    decimals = Rows(column_names=["x"], rows=[(decimal.Decimal("0.1"),)])
+    assert floats != decimals
+    assert floats.fingerprint() == decimals.fingerprint()
+    assert floats != decimals
+
+    ints = Rows(column_names=["x"], rows=[(1,)])
+    more_floats = Rows(column_names=["x"], rows=[(1.0,)])
+    assert ints == more_floats
+    assert hash(ints) == hash(more_floats)
+
+
+def test_parquet_round_trip(tmp_path) -> None:
+    pytest.importorskip("pyarrow")
+    items = list(zip("abcdefghij", range(10)))
+    dummy_rows = Rows(column_names=["name", "age"], rows=items)
+    path = tmp_path / "snapshot.parquet"
+    dummy_rows.to_parquet(path, row_group_size=4)
+    assert Rows.from_parquet(path) == dummy_rows
+    assert Rows.from_parquet(path, columns=["age"]).column("age") == list(range(10))
+    batches = list(Rows.iter_parquet(path, batch_size=3))
+    assert [batch.row_count for batch in batches] == [3, 3, 3, 1]
+    assert Rows.concat(batches) == dummy_rows
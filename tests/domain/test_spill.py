@@ -0,0 +1,72 @@
+import pytest
+
+from py_db_adapter.domain.column_storage import ChunkedColumn
+from py_db_adapter.domain.rows import Rows
+from py_db_adapter.domain.spill import *
+
+
+def test_spilled_column_round_trip() -> None:
+    spill_file = SpillFile()
+    values = tuple(range(1_000))
+    spilled = spill_file.spill(values)
+    assert isinstance(spilled, SpilledColumn)
+    assert len(spilled) == 1_000
+    assert tuple(spilled) == values
+    assert spilled[10:13] == (10, 11, 12)
+    assert spilled[-1] == 999
+
+
+def test_memory_budget_spills_once_the_budget_is_used_up() -> None:
+    budget = MemoryBudget(2 * estimate_nbytes(tuple(range(100))))
+    first = budget.store(tuple(range(100)))
+    second = budget.store(tuple(range(100, 200)))
+    third = budget.store(tuple(range(200, 300)))
+    assert not isinstance(first, SpilledColumn)
+    assert not isinstance(second, SpilledColumn)
+    assert isinstance(third, SpilledColumn)
+    assert budget.spilled
+    assert budget.used <= budget.max_bytes
+    assert tuple(third) == tuple(range(200, 300))
+
+
+def test_batches_load_each_spilled_chunk_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    budget = MemoryBudget(0)
+    ids = budget.store(tuple(range(2_000)))
+    names = budget.store(tuple(str(i) for i in range(2_000)))
+    rs = Rows.from_columns(
+        column_names=["id", "name"],
+        columns=[ChunkedColumn([ids]), ChunkedColumn([names])],
+    )
+
+    loads = []
+    original_load = SpillFile.load
+
+    def counting_load(self, offset, nbytes):  # type: ignore
+        loads.append(offset)
+        return original_load(self, offset, nbytes)
+
+    monkeypatch.setattr(SpillFile, "load", counting_load)
+    batches = list(rs.batches(500))
+    assert [batch.as_tuples() for batch in batches] == [
+        [(i, str(i)) for i in range(start, start + 500)]
+        for start in range(0, 2_000, 500)
+    ]
+    assert len(loads) == 2 * len(batches)
+
+
+def test_take_loads_each_spilled_chunk_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    budget = MemoryBudget(0)
+    chunks = [budget.store(tuple(range(start, start + 100))) for start in (0, 100)]
+    rs = Rows.from_columns(column_names=["id"], columns=[ChunkedColumn(chunks)])
+
+    loads = []
+    original_load = SpillFile.load
+
+    def counting_load(self, offset, nbytes):  # type: ignore
+        loads.append(offset)
+        return original_load(self, offset, nbytes)
+
+    monkeypatch.setattr(SpillFile, "load", counting_load)
+    positions = list(range(0, 200, 7))
+    assert list(rs.take(positions).column("id")) == positions
+    assert len(loads) == 2
@@ -0,0 +1,69 @@
+import py_db_adapter as pda
+
+
+def test_select_row_hashes_sql_keeps_full_precision() -> None:
+    sql_adapter = pda.SqlServerSQLAdapter()
+    sql = sql_adapter.select_row_hashes(
+        schema_name="dbo",
+        table_name="payment",
+        key_columns=["payment_id"],
+        hash_columns=[
+            pda.Column(
+                column_name="amount",
+                nullable=False,
+                data_type=pda.DataType.Decimal,
+                precision=19,
+                scale=4,
+            ),
+            pda.Column(
+                column_name="paid_at", nullable=True, data_type=pda.DataType.DateTime
+            ),
+            pda.Column(column_name="rate", nullable=True, data_type=pda.DataType.Float),
+            pda.Column(
+                column_name="memo",
+                nullable=True,
+                data_type=pda.DataType.Text,
+                max_length=100,
+            ),
+        ],
+    )
+    # fmt: off
+    assert sql == (
+        "SELECT DISTINCT payment_id,"
+        "CONVERT(CHAR(32), HASHBYTES('MD5', "
+        "ISNULL(CONVERT(NVARCHAR(MAX), amount, 2), N'\\N') + NCHAR(31) + "
+        "ISNULL(CONVERT(NVARCHAR(MAX), paid_at, 126), N'\\N') + NCHAR(31) + "
+        "ISNULL(CONVERT(NVARCHAR(MAX), rate, 3), N'\\N') + NCHAR(31) + "
+        "ISNULL(CAST(memo AS NVARCHAR(MAX)), N'\\N')), 2) AS row_hash FROM dbo.payment"
+    )
+    # fmt: on
+
+
+def test_select_bucket_checksums_sql_keeps_full_precision() -> None:
+    sql_adapter = pda.SqlServerSQLAdapter()
+    sql = sql_adapter.select_bucket_checksums(
+        schema_name="dbo",
+        table_name="payment",
+        key_column="payment_id",
+        checksum_columns=[
+            pda.Column(
+                column_name="paid_at", nullable=True, data_type=pda.DataType.DateTime
+            ),
+            pda.Column(
+                column_name="payment_id", nullable=False, data_type=pda.DataType.Int
+            ),
+        ],
+        key_ranges=[(0, 256)],
+        offset=0,
+        width=16,
+    )
+    # fmt: off
+    assert sql == (
+        "SELECT FLOOR((payment_id - 0) / 16) AS bucket, COUNT(*) AS row_count, "
+        "SUM(CAST(CAST(CAST(HASHBYTES('MD5', "
+        "ISNULL(CONVERT(NVARCHAR(MAX), paid_at, 126), N'\\N') + NCHAR(31) + "
+        "ISNULL(CAST(payment_id AS NVARCHAR(MAX)), N'\\N')) AS BINARY(4)) AS INT) AS BIGINT)) AS checksum "
+        "FROM dbo.payment WHERE (payment_id >= 0 AND payment_id < 256) "
+        "GROUP BY FLOOR((payment_id - 0) / 16)"
+    )
+    # fmt: on
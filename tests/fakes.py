@@ -0,0 +1,37 @@
+import typing
+
+
+class FakeCursor:
+    """Cursor that returns canned rows and records the sizes it was asked to fetch
+
+    Cursors get a connection of their own unless one is passed in, so tests can
+    set up cursors that share a connection.
+    """
+
+    def __init__(
+        self,
+        *,
+        column_names: typing.List[str],
+        rows: typing.List[typing.Tuple[typing.Any, ...]],
+        connection: typing.Optional[object] = None,
+    ):
+        self.connection = object() if connection is None else connection
+        self.description = [(col_name,) for col_name in column_names]
+        self.fetchmany_sizes: typing.List[int] = []
+        self._rows = rows
+        self._pos = 0
+
+    def execute(self, sql: str, *params: typing.Any) -> "FakeCursor":
+        self._pos = 0
+        return self
+
+    def fetchall(self) -> typing.List[typing.Tuple[typing.Any, ...]]:
+        rows = self._rows[self._pos :]
+        self._pos = len(self._rows)
+        return rows
+
+    def fetchmany(self, size: int) -> typing.List[typing.Tuple[typing.Any, ...]]:
+        self.fetchmany_sizes.append(size)
+        rows = self._rows[self._pos : self._pos + size]
+        self._pos += len(rows)
+        return rows
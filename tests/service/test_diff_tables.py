@@ -0,0 +1,271 @@
+import dataclasses
+import logging
+import math
+import sqlite3
+import typing
+import zlib
+
+import pytest
+
+from py_db_adapter import adapter, domain, service
+
+
+class SqliteSqlAdapter(adapter.PostgreSQLAdapter):
+    def row_checksum_expression(
+        self, /, columns: typing.Sequence[domain.Column]
+    ) -> str:
+        col_names_csv = ", ".join(self.wrap(column.column_name) for column in columns)
+        return f"checksum32({col_names_csv})"
+
+
+class SqliteAdapter(adapter.PostgresAdapter):
+    def __init__(self) -> None:
+        super().__init__(sql_adapter=SqliteSqlAdapter())
+        self.bucket_widths: typing.List[int] = []
+        self.key_streams = 0
+
+    def bucket_checksums(
+        self, **kwargs: typing.Any
+    ) -> typing.Dict[int, typing.Tuple[int, int]]:
+        self.bucket_widths.append(kwargs["width"])
+        return super().bucket_checksums(**kwargs)
+
+    def stream_table_keys(self, **kwargs: typing.Any) -> domain.RowStream:
+        self.key_streams += 1
+        return super().stream_table_keys(**kwargs)
+
+
+def sqlite_cursor(
+    rows: typing.List[typing.Tuple[typing.Any, ...]], /, key_type: str = "INTEGER"
+) -> sqlite3.Cursor:
+    con = sqlite3.connect(":memory:")
+    con.create_function(
+        "checksum32",
+        -1,
+        lambda *values: zlib.crc32(repr(values).encode()) - 2**31,
+        deterministic=True,
+    )
+    con.create_function("FLOOR", 1, math.floor, deterministic=True)
+    con.execute(f"CREATE TABLE t (id {key_type} PRIMARY KEY, val TEXT)")
+    con.executemany("INSERT INTO t VALUES (?, ?)", rows)
+    return con.cursor()
+
+
+def sqlite_table(key_type: domain.DataType = domain.DataType.Int) -> domain.Table:
+    return domain.Table(
+        schema_name=None,
+        table_name="t",
+        columns=frozenset(
+            {
+                domain.Column(column_name="id", nullable=False, data_type=key_type),
+                domain.Column(
+                    column_name="val",
+                    nullable=True,
+                    data_type=domain.DataType.Text,
+                    max_length=100,
+                ),
+            }
+        ),
+        primary_key=domain.PrimaryKey(
+            schema_name=None, table_name="t", columns=("id",)
+        ),
+    )
+
+
+def diff(
+    *,
+    src_rows: typing.List[typing.Tuple[typing.Any, ...]],
+    dest_rows: typing.List[typing.Tuple[typing.Any, ...]],
+    strategy: domain.DiffStrategy,
+    key_type: domain.DataType = domain.DataType.Int,
+    sql_key_type: typing.Optional[str] = None,
+    batch_size: int = 100,
+    src_db_adapter: typing.Optional[SqliteAdapter] = None,
+    dest_db_adapter: typing.Optional[SqliteAdapter] = None,
+) -> typing.Tuple[typing.List[typing.Any], ...]:
+    if sql_key_type is None:
+        sql_key_type = "INTEGER" if key_type == domain.DataType.Int else "TEXT"
+    table = sqlite_table(key_type)
+    result = service.diff_tables(
+        src_cur=sqlite_cursor(src_rows, key_type=sql_key_type),
+        dest_cur=sqlite_cursor(dest_rows, key_type=sql_key_type),
+        src_db_adapter=src_db_adapter or SqliteAdapter(),
+        dest_db_adapter=dest_db_adapter or SqliteAdapter(),
+        src_table=table,
+        dest_table=table,
+        key_cols={"id"},
+        compare_cols={"val"},
+        strategy=strategy,
+        batch_size=batch_size,
+    )
+    return summarize(result)
+
+
+def summarize(result: service.TableDiff) -> typing.Tuple[typing.List[typing.Any], ...]:
+    return (
+        [result.src_rows, result.dest_rows],
+        sorted(result.diff.rows_added.as_tuples()),
+        sorted(result.diff.rows_deleted.as_tuples()),
+        sorted(result.diff.rows_updated.as_tuples()),
+    )
+
+
+def test_bucketed_checksum_drills_down_to_the_changed_rows() -> None:
+    src_rows = [(i, f"value {i}") for i in range(20_000)]
+    dest_rows = [(i, "changed" if i == 123 else f"value {i}") for i in range(1, 20_001)]
+    src_db_adapter = SqliteAdapter()
+    actual = diff(
+        src_rows=src_rows,
+        dest_rows=dest_rows,
+        strategy=domain.DiffStrategy.BucketedChecksum,
+        src_db_adapter=src_db_adapter,
+    )
+    expected = diff(
+        src_rows=src_rows, dest_rows=dest_rows, strategy=domain.DiffStrategy.Lookup
+    )
+    assert actual == expected
+    assert actual[1:] == (
+        [(0, "value 0")],
+        [(20_000,)],
+        [(123, "value 123")],
+    )
+    # each level narrows the buckets 16-fold until they fit in a batch
+    assert src_db_adapter.bucket_widths == [4_096, 256, 16]
+
+
+def test_bucketed_checksum_falls_back_when_too_many_buckets_differ(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    src_rows = [(i, f"value {i}") for i in range(20_000)]
+    dest_rows = [(i, f"changed {i}") for i in range(20_000)]
+    with caplog.at_level(logging.INFO):
+        actual = diff(
+            src_rows=src_rows,
+            dest_rows=dest_rows,
+            strategy=domain.DiffStrategy.BucketedChecksum,
+        )
+    expected = diff(
+        src_rows=src_rows, dest_rows=dest_rows, strategy=domain.DiffStrategy.Lookup
+    )
+    assert actual == expected
+    assert len(actual[3]) == 20_000
+    assert "buckets of 16 keys differ" in caplog.text
+
+
+def test_bucketed_checksum_skips_buckets_when_the_key_range_fits_in_a_batch() -> None:
+    src_db_adapter = SqliteAdapter()
+    actual = diff(
+        src_rows=[(1, "a"), (2, "b"), (50, "c")],
+        dest_rows=[(2, "x"), (3, "d")],
+        strategy=domain.DiffStrategy.BucketedChecksum,
+        src_db_adapter=src_db_adapter,
+    )
+    assert actual == ([3, 2], [(1, "a"), (50, "c")], [(3,)], [(2, "b")])
+    assert src_db_adapter.bucket_widths == []
+
+
+def test_bucketed_checksum_of_empty_tables() -> None:
+    src_db_adapter = SqliteAdapter()
+    actual = diff(
+        src_rows=[],
+        dest_rows=[],
+        strategy=domain.DiffStrategy.BucketedChecksum,
+        src_db_adapter=src_db_adapter,
+    )
+    assert actual == ([0, 0], [], [], [])
+    assert src_db_adapter.bucket_widths == []
+
+
+def test_bucketed_checksum_falls_back_for_a_text_key() -> None:
+    src_db_adapter = SqliteAdapter()
+    src_rows = [("a", "1"), ("b", "2"), ("c", "3")]
+    dest_rows = [("b", "2"), ("c", "x"), ("d", "4")]
+    actual = diff(
+        src_rows=src_rows,
+        dest_rows=dest_rows,
+        strategy=domain.DiffStrategy.BucketedChecksum,
+        key_type=domain.DataType.Text,
+        src_db_adapter=src_db_adapter,
+    )
+    expected = diff(
+        src_rows=src_rows,
+        dest_rows=dest_rows,
+        strategy=domain.DiffStrategy.Lookup,
+        key_type=domain.DataType.Text,
+    )
+    assert actual == expected == ([3, 3], [("a", "1")], [("d",)], [("c", "3")])
+    assert src_db_adapter.bucket_widths == []
+
+
+def test_sort_merge_matches_lookup() -> None:
+    src_rows = [(i, f"value {i}") for i in range(1_000)]
+    dest_rows = [(i, "changed" if i == 500 else f"value {i}") for i in range(1, 1_001)]
+    src_db_adapter = SqliteAdapter()
+    actual = diff(
+        src_rows=src_rows,
+        dest_rows=dest_rows,
+        strategy=domain.DiffStrategy.SortMerge,
+        src_db_adapter=src_db_adapter,
+    )
+    expected = diff(
+        src_rows=src_rows, dest_rows=dest_rows, strategy=domain.DiffStrategy.Lookup
+    )
+    assert actual == expected
+    assert actual[1:] == ([(0, "value 0")], [(1_000,)], [(500, "value 500")])
+    assert src_db_adapter.key_streams == 1
+
+
+def test_sort_merge_falls_back_when_keys_are_not_sorted(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    # a case-insensitive collation sorts "a" before "B", which Python does not
+    src_rows = [("B", "1"), ("a", "2"), ("c", "3")]
+    dest_rows = [("a", "x"), ("c", "3"), ("D", "4")]
+    with caplog.at_level(logging.WARNING):
+        actual = diff(
+            src_rows=src_rows,
+            dest_rows=dest_rows,
+            strategy=domain.DiffStrategy.SortMerge,
+            key_type=domain.DataType.Text,
+            sql_key_type="TEXT COLLATE NOCASE",
+        )
+    expected = diff(
+        src_rows=src_rows,
+        dest_rows=dest_rows,
+        strategy=domain.DiffStrategy.Lookup,
+        key_type=domain.DataType.Text,
+        sql_key_type="TEXT COLLATE NOCASE",
+    )
+    assert actual == expected == ([3, 3], [("B", "1")], [("D",)], [("a", "2")])
+    assert "Falling back to the lookup strategy" in caplog.text
+
+
+@pytest.mark.parametrize("same_cursor", [True, False])
+def test_sort_merge_falls_back_when_the_connection_is_shared(
+    same_cursor: bool,
+) -> None:
+    cur = sqlite_cursor([(1, "a"), (2, "b"), (3, "c")])
+    cur.execute("CREATE TABLE t2 (id INTEGER PRIMARY KEY, val TEXT)")
+    cur.executemany("INSERT INTO t2 VALUES (?, ?)", [(2, "b"), (3, "x"), (4, "d")])
+    src_table = sqlite_table()
+    dest_table = dataclasses.replace(
+        src_table,
+        table_name="t2",
+        primary_key=domain.PrimaryKey(
+            schema_name=None, table_name="t2", columns=("id",)
+        ),
+    )
+    db_adapter = SqliteAdapter()
+    result = service.diff_tables(
+        src_cur=cur,
+        dest_cur=cur if same_cursor else cur.connection.cursor(),
+        src_db_adapter=db_adapter,
+        dest_db_adapter=db_adapter,
+        src_table=src_table,
+        dest_table=dest_table,
+        key_cols={"id"},
+        compare_cols={"val"},
+        strategy=domain.DiffStrategy.SortMerge,
+    )
+    assert summarize(result) == ([3, 3], [(1, "a")], [(4,)], [(3, "c")])
+    assert db_adapter.key_streams == 0
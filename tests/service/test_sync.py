@@ -1,6 +1,8 @@
 import pyodbc
 
-from py_db_adapter import adapter, service
+from py_db_adapter import adapter, domain, service
+from py_db_adapter.service.sync import _full_load_rows
+from tests.fakes import FakeCursor
 
 
 def check_customer2_table_in_sync(cur: pyodbc.Cursor) -> None:
@@ -86,3 +88,42 @@ def test_sync_with_explicit_cols(pg_cursor: pyodbc.Cursor) -> None:
     assert result.added == 0
     assert result.deleted == 1
     assert result.updated == 0
+
+
+def test_full_load_streams_only_over_a_connection_of_its_own() -> None:
+    table = domain.Table(
+        schema_name="sales",
+        table_name="customer",
+        columns=frozenset(
+            {
+                domain.Column(
+                    column_name="customer_id",
+                    nullable=False,
+                    data_type=domain.DataType.Int,
+                ),
+                domain.Column(
+                    column_name="customer_first_name",
+                    nullable=True,
+                    data_type=domain.DataType.Text,
+                    max_length=100,
+                ),
+            }
+        ),
+        primary_key=domain.PrimaryKey(
+            schema_name="sales", table_name="customer", columns=("customer_id",)
+        ),
+    )
+    repo = domain.Repository(db=adapter.PostgresAdapter(), table=table)
+    rows = [(1, "Mark"), (2, "Mandie")]
+
+    def full_load(src_cur: FakeCursor, dest_cur: FakeCursor) -> domain.RowSource:
+        return _full_load_rows(
+            src_repo=repo, src_cur=src_cur, dest_cur=dest_cur, columns=None
+        )
+
+    src_cur = FakeCursor(column_names=["customer_id", "customer_first_name"], rows=rows)
+    shared = FakeCursor(column_names=[], rows=[], connection=src_cur.connection)
+    separate = FakeCursor(column_names=[], rows=[])
+    assert isinstance(full_load(src_cur, src_cur), domain.Rows)
+    assert isinstance(full_load(src_cur, shared), domain.Rows)
+    assert isinstance(full_load(src_cur, separate), domain.RowStream)